@@ -0,0 +1,51 @@
+"""Nearest-archetype matching: min() scan vs ArchetypeIndex.
+
+Matches 100k truth-file rates against 100k archetype prices. The full linear
+scan would take hours at that size, so it is timed on a sample of roles and
+extrapolated.
+
+Run from the repo root:  python -m benchmarks.bench_archetypes
+"""
+import random
+import time
+
+from ratecard.archetypes import ArchetypeIndex
+
+def linear_nearest(available_rates, target_rate):
+    """generate_rates_v3's original matching rule."""
+    return min(available_rates, key=lambda x: abs(x - target_rate))
+
+def main(num_archetypes=100_000, num_roles=100_000, scan_sample=50, seed=42):
+    rng = random.Random(seed)
+    profiles = {}
+    while len(profiles) < num_archetypes:
+        profiles[round(rng.uniform(20, 2000), 2)] = None
+    targets = [round(rng.uniform(10, 2100), 2) for _ in range(num_roles)]
+
+    start = time.perf_counter()
+    index = ArchetypeIndex(profiles)
+    index.nearest_many(targets[:1])  # imports NumPy and builds the price array
+    build = time.perf_counter() - start
+    print(f"{len(index)} archetypes, {len(targets)} roles (index build {build * 1000:.1f} ms)")
+
+    sample = targets[:scan_sample]
+    start = time.perf_counter()
+    expected = [linear_nearest(index.prices, t) for t in sample]
+    scan = (time.perf_counter() - start) / len(sample) * len(targets)
+    print(f"min() scan:      {scan:10.2f} s  (extrapolated from {len(sample)} roles)")
+
+    start = time.perf_counter()
+    single = [index.nearest(t) for t in targets]
+    bisect_time = time.perf_counter() - start
+    print(f"nearest():       {bisect_time:10.4f} s")
+
+    start = time.perf_counter()
+    batch = index.nearest_many(targets)
+    batch_time = time.perf_counter() - start
+    print(f"nearest_many():  {batch_time:10.4f} s")
+
+    assert single[:len(sample)] == expected
+    assert [float(p) for p in batch] == single
+
+if __name__ == "__main__":
+    main()
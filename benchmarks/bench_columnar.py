@@ -0,0 +1,35 @@
+"""Reload time of a refined rate card: csv.DictReader vs the columnar cache.
+
+Run from the repo root:  python -m benchmarks.bench_columnar [refined.csv]
+"""
+import csv
+import sys
+import time
+
+from ratecard.columnar import load_columnar, write_columnar
+from ratecard.money import clean_currency
+
+def load_csv(path):
+    with open(path, mode='r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return [clean_currency(r['Rate_low']) for r in rows]
+
+def main(path='GLOBAL_COST_RATES_ENRICHED_FINAL.csv'):
+    start = time.perf_counter()
+    write_columnar(path)
+    print(f"export:           {time.perf_counter() - start:8.3f} s")
+
+    start = time.perf_counter()
+    rates = load_csv(path)
+    print(f"DictReader load:  {time.perf_counter() - start:8.3f} s  ({len(rates)} rows)")
+
+    start = time.perf_counter()
+    columns = load_columnar(path)
+    opened = time.perf_counter() - start
+    total = float(columns['Rate_low'].sum())
+    touched = time.perf_counter() - start
+    print(f"columnar open:    {opened * 1000:8.3f} ms")
+    print(f"open + sum col:   {touched * 1000:8.3f} ms  (sum {total:.2f})")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
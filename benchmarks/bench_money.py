@@ -0,0 +1,41 @@
+"""Per-call cost of ratecard.money.clean_currency vs the old copy-pasted version.
+
+Run from the repo root:  python -m benchmarks.bench_money
+"""
+import timeit
+
+from ratecard.money import clean_currency, parse_money
+
+# Values as they appear in the master, raw and EG bands files.
+SAMPLES = {
+    'plain': ['75', '75.00', '375.00', '1165.31', '90'],
+    'symbol': ['£75', '$104', '€1,200.00', '£1,553.74', '$ 95'],
+    'quoted': [' $ 104,210.00 ', ' $ 8,684.17 ', ' $ 2,003.89 ', ' $ 400.78 ', ' $ 50.10 '],
+    'empty/junk': ['', 'n/a', '-', 'TBC', ''],
+}
+
+def legacy_clean_currency(val):
+    """refine_rates_v10's implementation before the shared parser."""
+    if not val: return 0.0
+    clean = str(val).replace('£', '').replace('$', '').replace('€', '').replace(',', '').strip()
+    try:
+        return float(clean)
+    except:
+        return 0.0
+
+def per_call_ns(func, values, number):
+    timer = timeit.Timer(lambda: [func(v) for v in values])
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / (number * len(values)) * 1e9
+
+def main(number=20000):
+    print(f"{'values':<12} {'legacy ns':>10} {'shared ns':>10} {'speedup':>8}")
+    for name, values in SAMPLES.items():
+        parse_money.cache_clear()
+        legacy = per_call_ns(legacy_clean_currency, values, number)
+        shared = per_call_ns(clean_currency, values, number)
+        print(f"{name:<12} {legacy:>10.1f} {shared:>10.1f} {legacy / shared:>7.2f}x")
+    print(parse_money.cache_info())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""Benchmark every refine_rates / generate_rates script on synthetic inputs.
+
+Each script runs in a fresh process inside a scratch directory holding
+synthetic files under the names it hard-codes, so wall time and peak RSS are
+measured per script and size. refine_rates_v10 is additionally timed stage by
+stage (read, lookup, enrich, write).
+
+Results are appended to benchmarks/results/pipelines.jsonl and compared with
+the previous run of the same script and size, so regressions show up run over
+run.
+
+Run from the repo root:
+    python -m benchmarks.bench_pipelines --sizes 10k,100k
+    python -m benchmarks.bench_pipelines --sizes 1M,10M --scripts refine_rates_v10.py
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import synth
+from ratecard.profiling import maxrss_kb, peak_rss_kb
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'data')
+RESULTS_FILE = os.path.join(REPO_ROOT, 'benchmarks', 'results', 'pipelines.jsonl')
+
+MASTER_REFINED = 'Master_ Concept_Creative Modelling - _REFINED.csv'
+TRUTH_FILE = 'Roles x Rates reconcilliation - _ADJUSTED FOR TRUTH.csv'
+RAW_FILE = 'Roles x Rates reconcilliation - _RAW_CONTENT LAB.csv'
+GENERATE_INPUTS = {TRUTH_FILE: 'truth', RAW_FILE: 'raw'}
+
+# Script -> {input file name it hard-codes: synthetic input kind}.
+# Only v8+ detect the header row, so older scripts get inputs without preamble.
+SCRIPTS = {
+    'refine_rates.py': {MASTER_REFINED: 'plain'},
+    'refine_rates_local.py': {MASTER_REFINED: 'plain'},
+    'refine_rates_v4.py': {MASTER_REFINED: 'plain'},
+    'refine_rates_v5.py': {'GLOBAL_COST_RATES_FINAL.csv': 'plain'},
+    'refine_rates_v6.py': {'GLOBAL_COST_RATES_FINAL.csv': 'plain'},
+    'refine_rates_v7.py': {'Master_3000_Rows.csv': 'plain'},
+    'refine_rates_v8.py': {'Master_3000_Rows.csv': 'master'},
+    'refine_rates_v9.py': {'Master_3000_Rows.csv': 'master'},
+    'refine_rates_v10.py': {'Master_3000_Rows.csv': 'master'},
+    'generate_rates_local.py': GENERATE_INPUTS,
+    'generate_rates_v2.py': GENERATE_INPUTS,
+    'generate_rates_v3.py': GENERATE_INPUTS,
+}
+
+def parse_size(text):
+    text = text.strip().lower()
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * scale)
+
+def input_rows(kind, size):
+    """Rows to synthesize for `kind` so the script produces about `size` output rows."""
+    if kind == 'truth':
+        return max(1, size // 13)  # generate fans every truth role out to 13 regions
+    if kind == 'raw':
+        return max(50, size // 100)
+    return size
+
+def synthetic_input(kind, size):
+    """Path of a cached synthetic input, generating it on first use."""
+    rows = input_rows(kind, size)
+    path = os.path.join(DATA_DIR, f"{kind}_{rows}.csv")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"  synthesizing {kind} x {rows} rows...")
+        synth.write(kind, path + '.tmp', rows)
+        os.replace(path + '.tmp', path)
+    return path
+
+def run_process(args, cwd, timeout, stdout=subprocess.DEVNULL):
+    """Runs `args` and returns (status, seconds, peak RSS in KB) for that child only."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    start = time.perf_counter()
+    proc = subprocess.Popen(args, cwd=cwd, env=env, stdout=stdout, stderr=subprocess.DEVNULL)
+    while True:
+        pid, wait_status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() - start > timeout:
+            proc.kill()
+            _, wait_status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = -9
+            return 'timeout', time.perf_counter() - start, maxrss_kb(usage.ru_maxrss)
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    return ('ok' if proc.returncode == 0 else 'failed'), elapsed, maxrss_kb(usage.ru_maxrss)
+
+def bench_script(script, size, timeout):
+    with tempfile.TemporaryDirectory() as scratch:
+        for name, kind in SCRIPTS[script].items():
+            os.symlink(synthetic_input(kind, size), os.path.join(scratch, name))
+        status, elapsed, peak_rss = run_process([sys.executable, os.path.join(REPO_ROOT, script)], scratch, timeout)
+    return {'status': status, 'total_s': round(elapsed, 4), 'peak_rss_kb': peak_rss}
+
+def v10_stages(input_file, output_file):
+    """Times refine_rates_v10's pipeline stage by stage in this process."""
+    from ratecard import engine as v10
+    from ratecard.ingest import open_rate_file
+    from ratecard.rows import RowSchema
+
+    stages = {}
+    peak = {}
+
+    def mark(stage, start):
+        stages[stage] = round(time.perf_counter() - start, 4)
+        peak[stage] = peak_rss_kb()
+
+    start = time.perf_counter()
+    with open_rate_file(input_file) as rate_file:
+        headers = rate_file.headers
+        rows = list(rate_file.rows())
+    mark('read', start)
+
+    start = time.perf_counter()
+    schema = RowSchema(headers)
+    rate_lookup = {}
+    for row in rows:
+        v10.add_to_lookup(rate_lookup, row, schema.index)
+    mark('lookup', start)
+
+    start = time.perf_counter()
+    records = [schema.make_row(row) for row in rows]
+    del rows
+    proxies = v10.PROXY_RESOLVER.bind(rate_lookup)
+    for record in records:
+        v10.enrich_row(record, proxies)
+    mark('enrich', start)
+
+    start = time.perf_counter()
+    final_headers = v10.get_output_headers(headers)
+    to_values = schema.writer_for(final_headers)
+    with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(final_headers)
+        writer.writerows(map(to_values, records))
+    mark('write', start)
+
+    return {'stages': stages, 'stage_peak_rss_kb': peak}
+
+def bench_v10_stages(size, timeout):
+    with tempfile.TemporaryDirectory() as scratch:
+        report = os.path.join(scratch, 'stages.json')
+        args = [sys.executable, '-m', 'benchmarks.bench_pipelines', '--v10-stages',
+                synthetic_input('master', size), os.path.join(scratch, 'out.csv'), report]
+        status, elapsed, peak_rss = run_process(args, REPO_ROOT, timeout)
+        result = {'status': status, 'total_s': round(elapsed, 4), 'peak_rss_kb': peak_rss}
+        if status == 'ok':
+            with open(report, mode='r', encoding='utf-8') as f:
+                result.update(json.load(f))
+    return result
+
+def git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_previous():
+    """Latest saved result per (benchmark, size)."""
+    previous = {}
+    if os.path.exists(RESULTS_FILE):
+        with open(RESULTS_FILE, mode='r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                previous[(record['benchmark'], record['size'])] = record
+    return previous
+
+def report(record, previous):
+    line = f"  {record['benchmark']:<28} {record['size']:>10,} {record['status']:>8} {record['total_s']:>9.3f}s {record['peak_rss_kb'] / 1024:>8.1f}MB"
+    before = previous.get((record['benchmark'], record['size']))
+    if before and before['status'] == 'ok' and record['status'] == 'ok' and before['total_s']:
+        change = (record['total_s'] - before['total_s']) / before['total_s'] * 100
+        line += f"  ({change:+.1f}% vs {before.get('commit') or 'last run'})"
+    if 'stages' in record:
+        line += '\n' + ' ' * 30 + '  '.join(f"{k}={v:.3f}s" for k, v in record['stages'].items())
+    print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the refine/generate scripts on synthetic inputs.")
+    parser.add_argument('--sizes', default='10k,100k', help="comma-separated row counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument('--scripts', default=','.join(SCRIPTS), help="comma-separated script names")
+    parser.add_argument('--timeout', type=float, default=600, help="seconds before a run is killed")
+    parser.add_argument('--no-save', action='store_true', help="don't append to the results file")
+    parser.add_argument('--v10-stages', nargs=3, metavar=('INPUT', 'OUTPUT', 'REPORT'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.v10_stages:
+        input_file, output_file, report_file = args.v10_stages
+        with open(report_file, mode='w', encoding='utf-8') as f:
+            json.dump(v10_stages(input_file, output_file), f)
+        return
+
+    previous = load_previous()
+    run_info = {'timestamp': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': git_commit()}
+    records = []
+    for size in [parse_size(s) for s in args.sizes.split(',')]:
+        print(f"size {size:,}")
+        benchmarks = [(script, lambda s=script: bench_script(s, size, args.timeout))
+                      for script in args.scripts.split(',')]
+        benchmarks.append(('refine_rates_v10.py:stages', lambda: bench_v10_stages(size, args.timeout)))
+        for name, run in benchmarks:
+            record = dict(run_info, benchmark=name, size=size, **run())
+            report(record, previous)
+            records.append(record)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
+        with open(RESULTS_FILE, mode='a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+        print(f"Saved {len(records)} results to {RESULTS_FILE}")
+
+if __name__ == "__main__":
+    main()
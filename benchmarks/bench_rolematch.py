@@ -0,0 +1,82 @@
+"""Role-title matching: scoring every title vs RoleIndex's blocked search.
+
+Builds a synthetic supplier catalog of 50k titles ('Senior Digital Brand
+Producer', 'CI - Research Media Director', ...) and matches 2k noisy truth
+titles against it (abbreviations, dropped words, domain prefixes). Titles
+carry no ID or other unique token, so blocks have to come from ordinary
+words. The full scan scores every catalog title per query, is timed on a
+sample and extrapolated. Block sizes are reported per query, including
+for a query made only of common words.
+
+Run from the repo root:  python -m benchmarks.bench_rolematch
+"""
+import random
+import time
+
+from ratecard.rolematch import SENIORITY_WORDS, RoleIndex, title_tokens, trigrams
+
+SENIORITY = ['', 'Junior', 'Senior', 'Associate', 'Lead', 'Principal', 'Head of']
+DOMAINS = ['Account', 'Creative', 'Digital', 'Print', 'Research', 'Data', 'Social Media', 'Regulatory',
+           'Medical', 'Production', 'Strategy', 'Content', 'Brand', 'Media', 'Analytics', 'Event']
+JOBS = ['Director', 'Manager', 'Producer', 'Analyst', 'Coordinator', 'Writer', 'Designer', 'Planner',
+        'Executive', 'Supervisor', 'Strategist', 'Editor', 'Developer', 'Buyer', 'Specialist']
+PREFIXES = ['', '', '', 'CI - ', 'HEOR - ', 'I&A - ', 'Advertising - ']
+SHORT = {'Senior': 'Sr.', 'Junior': 'Jr', 'Associate': 'Assoc.', 'Director': 'Dir', 'Manager': 'Mgr'}
+
+def synthetic_titles(rng, count):
+    titles = set()
+    while len(titles) < count:
+        words = [rng.choice(SENIORITY), *rng.sample(DOMAINS, 2), rng.choice(JOBS)]
+        titles.add(rng.choice(PREFIXES) + ' '.join(w for w in words if w))
+    return sorted(titles)
+
+def noisy(rng, title):
+    words = [SHORT.get(w, w) if rng.random() < 0.5 else w for w in title.split(' - ')[-1].split()]
+    if len(words) > 3 and rng.random() < 0.3:
+        del words[rng.randrange(len(words) - 1)]
+    return ' '.join(words)
+
+def main(num_titles=50_000, num_queries=2_000, scan_sample=20, seed=42):
+    rng = random.Random(seed)
+    titles = synthetic_titles(rng, num_titles)
+    prices = [round(rng.uniform(40, 300), 0) for _ in titles]
+    truths = rng.sample(range(len(titles)), num_queries)
+    queries = [noisy(rng, titles[i]) for i in truths]
+
+    start = time.perf_counter()
+    index = RoleIndex(titles, prices=prices)
+    print(f"{len(index)} titles, {len(queries)} queries (index build {time.perf_counter() - start:.2f} s)")
+
+    def scan(query):
+        tokens = set(title_tokens(query))
+        grams = trigrams(sorted(tokens))
+        seniority = tokens & SENIORITY_WORDS
+        return max((index.score(i, tokens, grams, seniority), -i) for i in range(len(index)))
+
+    sample = queries[:scan_sample]
+    start = time.perf_counter()
+    scanned = [scan(query) for query in sample]
+    scan_time = (time.perf_counter() - start) / len(sample) * len(queries)
+    print(f"full scan:     {scan_time:10.2f} s  (extrapolated from {len(sample)} queries)")
+
+    def block_size(query):
+        tokens = set(title_tokens(query))
+        return len(index.block(tokens, trigrams(sorted(tokens))))
+
+    sizes = sorted(block_size(query) for query in queries)
+    print(f"block sizes:   median {sizes[len(sizes) // 2]}, p95 {sizes[int(len(sizes) * 0.95)]}, "
+          f"max {sizes[-1]} of {len(index)} titles (cap {index.block_size})")
+    print(f"block size for 'Manager': {block_size('Manager')}")
+
+    start = time.perf_counter()
+    found = [index.best(query, min_score=0.0, tie=0.0) for query in queries]
+    blocked = time.perf_counter() - start
+    print(f"blocked best(): {blocked:9.2f} s")
+
+    hits = sum(1 for match, truth in zip(found, truths) if match and match[0] == truth)
+    print(f"exact title recovered for {hits / len(queries):.1%} of noisy queries")
+    agree = sum(1 for (score, _), match in zip(scanned, found) if match and abs(match[1] - score) < 1e-9)
+    print(f"blocked best score equals the full scan's for {agree} of {len(sample)} sampled queries")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Synthetic rate-card inputs for the benchmarks.
+
+Generates files shaped like the real ones at any size:
+
+    master  Master_3000_Rows.csv schema, with the "48,445,,,," junk preamble
+    plain   same schema without the preamble (for scripts using a bare DictReader)
+    truth   "_ADJUSTED FOR TRUTH.csv" (one GBP rate per role)
+    raw     "_RAW_CONTENT LAB.csv" (junk rows, multi-line header, per-country rates)
+
+Master rows mix Hour/Day units, local currencies and money formats, and leave
+Rate_low empty for some proxy regions so the proxy fill has work to do.
+
+Run from the repo root:  python -m benchmarks.synth master 100000 out.csv
+"""
+import csv
+import random
+import sys
+
+MASTER_HEADERS = ['Category | Function', 'Role', 'Resource type', 'Unit', 'Region',
+                  'Rate_low', 'Rate_high', 'Currency', 'Source', 'Notes']
+
+# (region, currency, price level relative to London)
+REGIONS = [
+    ('UK-LON', 'GBP', 1.0), ('US-NYC', 'USD', 1.5), ('US-SEA', 'USD', 1.4), ('US-AUS', 'USD', 1.2),
+    ('EU-ES', 'EUR', 0.9), ('EU-FR', 'EUR', 1.2), ('EU-DE', 'EUR', 1.2), ('EU-IT', 'EUR', 1.1),
+    ('LATAM-BR', 'BRL', 5.0), ('APAC-CN', 'CNY', 6.8), ('NA-CA', 'CAD', 1.3), ('EU-CH', 'CHF', 1.3),
+    ('APAC-IN', 'USD', 0.4), ('APAC-PH', 'USD', 0.45), ('LATAM-MX', 'USD', 0.6), ('EU-PL', 'USD', 0.6),
+]
+PROXY_REGIONS = {'US-SEA', 'US-AUS', 'EU-ES', 'APAC-PH'}
+
+CATEGORIES = ['Account Management', 'Creative', 'Strategy', 'Production', 'Technology', 'Data & Analytics']
+TITLES = ['Coordinator', 'Executive', 'Manager', 'Director', 'Designer', 'Copywriter', 'Producer',
+          'Developer', 'Analyst', 'Strategist', 'Art Director', 'Project Manager']
+SENIORITY = ['Junior', '', 'Senior', 'Lead', 'Principal']
+SUPPLIERS = ['OP_Content Lab', 'Supplier A', 'Supplier B', 'Supplier C']
+
+RAW_COUNTRIES = ['Spain', 'France', 'Germany', 'Italy', 'United Kingdom', 'Brazil', 'China_L', 'Canada',
+                 'Switzerland HQ', 'India-USD', 'China-USD', 'Mexico-USD', 'Poland-USD']
+RAW_LEVELS = [1.0, 1.3, 1.25, 1.2, 1.0, 5.0, 6.8, 1.25, 1.25, 0.4, 0.55, 0.6, 0.63]
+
+def role_name(i):
+    title = TITLES[i % len(TITLES)]
+    seniority = SENIORITY[(i // len(TITLES)) % len(SENIORITY)]
+    return f"{seniority} {title} {i // (len(TITLES) * len(SENIORITY))}".strip()
+
+def format_money(rng, value):
+    style = rng.random()
+    if style < 0.7:
+        return f"{value:.2f}"
+    if style < 0.85:
+        return f"{value:,.2f}"
+    return f" $ {value:,.2f} "
+
+def master_rows(num_rows, seed=0):
+    """Yields master-schema rows: every role gets every region, then the next role."""
+    rng = random.Random(seed)
+    role_index = 0
+    emitted = 0
+    while emitted < num_rows:
+        role = role_name(role_index)
+        category = CATEGORIES[role_index % len(CATEGORIES)]
+        supplier = SUPPLIERS[role_index % len(SUPPLIERS)]
+        base = rng.uniform(40, 260)
+        for region, currency, level in REGIONS:
+            if emitted >= num_rows:
+                break
+            unit = 'Day' if rng.random() < 0.2 else 'Hour'
+            rate = base * level * (8 if unit == 'Day' else 1)
+            if region in PROXY_REGIONS and rng.random() < 0.5:
+                rate_text = ''
+            else:
+                rate_text = format_money(rng, rate)
+            notes = 'Exact Rate Match' if rng.random() < 0.6 else ''
+            yield [category, role, 'FTE', unit, region, rate_text, rate_text, currency, supplier, notes]
+            emitted += 1
+        role_index += 1
+
+def write_master(path, num_rows, seed=0, preamble=True):
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        if preamble:
+            f.write(f"{num_rows},445,,,,,,,,\n")
+        writer = csv.writer(f)
+        writer.writerow(MASTER_HEADERS)
+        writer.writerows(master_rows(num_rows, seed))
+
+def write_truth(path, num_roles, seed=0):
+    rng = random.Random(seed)
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(MASTER_HEADERS)
+        for i in range(num_roles):
+            rate = round(rng.uniform(40, 260))
+            writer.writerow([CATEGORIES[i % len(CATEGORIES)], role_name(i), 'FTE', 'Hour', 'UK-LON',
+                             rate, rate, 'GBP', 'OP_Content Lab', ''])
+
+def write_raw(path, num_titles, seed=0):
+    rng = random.Random(seed)
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['', '', '', 'Supplier input needed on blue items below', 'Hourly Rates'] + [''] * 12)
+        writer.writerow(['', '', '', '', 'Onshore team members'] + [''] * 8 + ['USD'] * 4)
+        writer.writerow(['Department / Category', 'Job Title / Rate Card Title',
+                         'Seniority Level \n(incl Experience Range reference)',
+                         'Title Responsibilities / Accountabilities'] + RAW_COUNTRIES)
+        for i in range(num_titles):
+            uk = rng.uniform(40, 260)
+            rates = [f"{uk * level:.2f}" if rng.random() > 0.05 else '' for level in RAW_LEVELS]
+            writer.writerow([CATEGORIES[i % len(CATEGORIES)], role_name(i),
+                             f"Level {1 + i % 5}", 'Synthetic responsibilities.'] + rates)
+
+WRITERS = {
+    'master': write_master,
+    'plain': lambda path, n, seed=0: write_master(path, n, seed, preamble=False),
+    'truth': write_truth,
+    'raw': write_raw,
+}
+
+def write(kind, path, size, seed=0):
+    WRITERS[kind](path, size, seed)
+
+if __name__ == "__main__":
+    kind, size, path = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    write(kind, path, size)
@@ -0,0 +1,11 @@
+"""Rate-card refinement and generation.
+
+    from ratecard import refine, generate
+    refine(['suppliers/*.csv'], output_dir='refined')
+
+The same is available from the command line as `python -m ratecard`.
+"""
+from ratecard.engine import refine
+from ratecard.generator import generate
+
+__all__ = ['refine', 'generate']
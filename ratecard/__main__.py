@@ -0,0 +1,5 @@
+import sys
+
+from ratecard.cli import main
+
+sys.exit(main())
@@ -0,0 +1,68 @@
+"""Nearest-price lookup over supplier rate archetypes.
+
+generate_rates maps each truth-file role to the raw rate-card row ("cost
+profile") whose GBP price is closest to the role's rate. ArchetypeIndex keeps
+the prices sorted and answers that question with a bisect, so matching M roles
+against N archetypes costs O(M log N) instead of O(M * N).
+
+Ties are broken towards the lower price, which is what the old
+`min(available_rates, key=lambda x: abs(x - target_rate))` did over the
+ascending price list.
+"""
+from bisect import bisect_left
+
+class ArchetypeIndex:
+    """Sorted GBP price -> profile map with nearest-price queries."""
+
+    def __init__(self, profiles):
+        """`profiles` maps a GBP price to its archetype (e.g. a raw rate-card row)."""
+        self.prices = sorted(profiles)
+        self.profiles = profiles
+        self._np_prices = None
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __contains__(self, price):
+        return price in self.profiles
+
+    def nearest(self, target):
+        """Returns the archetype price closest to `target` (lower price on ties)."""
+        if not self.prices:
+            raise ValueError("ArchetypeIndex is empty")
+        i = bisect_left(self.prices, target)
+        if i == 0:
+            return self.prices[0]
+        if i == len(self.prices):
+            return self.prices[-1]
+        below, above = self.prices[i - 1], self.prices[i]
+        return below if abs(below - target) <= abs(above - target) else above
+
+    def match(self, target):
+        """Returns (price, profile, exact) for the archetype closest to `target`."""
+        if target in self.profiles:
+            return target, self.profiles[target], True
+        price = self.nearest(target)
+        return price, self.profiles[price], False
+
+    def nearest_many(self, targets):
+        """Batch nearest(): the closest archetype price for every target.
+
+        Returns a NumPy array when NumPy is available, else a list.
+        """
+        if not self.prices:
+            raise ValueError("ArchetypeIndex is empty")
+        try:
+            import numpy as np
+        except ImportError:  # NumPy is optional; fall back to bisect.
+            return [self.nearest(t) for t in targets]
+
+        if self._np_prices is None:
+            self._np_prices = np.array(self.prices, dtype=np.float64)
+        prices = self._np_prices
+        targets = np.asarray(targets, dtype=np.float64)
+        i = np.searchsorted(prices, targets, side='left')
+        below = prices[np.clip(i - 1, 0, len(prices) - 1)]
+        above = prices[np.clip(i, 0, len(prices) - 1)]
+        use_below = (i == len(prices)) | ((i > 0) & (np.abs(below - targets) <= np.abs(above - targets)))
+        return np.where(use_below, below, above)
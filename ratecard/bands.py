@@ -0,0 +1,88 @@
+"""Band lookup for normalized hourly GBP rates.
+
+A band covers the half-open range `low < rate <= high`; anything outside all
+ranges is 'Unknown'. BandIndex keeps the ranges sorted by their upper bound so
+a rate is placed with one bisect instead of a scan over the table, and
+`classify()` bands a whole array in a single NumPy call when NumPy is
+installed. NumPy is only imported on the first classify() call, so scripts
+that band row by row don't pay for it.
+"""
+import json
+from bisect import bisect_left
+
+# Banding Logic (Hourly Rate Ranges in GBP) - Derived from the EG files
+BAND_RANGES = [
+    (0, 65, 'J'),
+    (65, 85, 'K'),
+    (85, 105, 'L'),
+    (105, 140, 'M'),
+    (140, 200, 'N'),
+    (200, 9999, 'O')
+]
+
+UNKNOWN_BAND = 'Unknown'
+
+class BandIndex:
+    """Sorted (low, high, band) ranges answering `low < rate <= high` lookups."""
+
+    def __init__(self, ranges=BAND_RANGES, fallback=UNKNOWN_BAND):
+        ranges = sorted(ranges, key=lambda r: r[1])
+        for (_, prev_high, prev_band), (low, high, band) in zip(ranges, ranges[1:]):
+            if low < prev_high:
+                raise ValueError(f"Band {band} ({low}-{high}] overlaps band {prev_band} (..-{prev_high}]")
+        for low, high, band in ranges:
+            if not low < high:
+                raise ValueError(f"Band {band} has an empty range ({low}-{high}]")
+
+        self.ranges = ranges
+        self.fallback = fallback
+        self._lows = [low for low, _, _ in ranges]
+        self._highs = [high for _, high, _ in ranges]
+        self._labels = [band for _, _, band in ranges]
+        self._np_tables = None
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def lookup(self, rate):
+        """Returns the band for one hourly GBP rate, or the fallback."""
+        i = bisect_left(self._highs, rate)
+        if i < len(self._highs) and rate > self._lows[i]:
+            return self._labels[i]
+        return self.fallback
+
+    def classify(self, rates):
+        """Bands a sequence of rates at once.
+
+        Returns a NumPy object array when NumPy is available, else a list.
+        """
+        try:
+            import numpy as np
+        except ImportError:  # NumPy is optional; fall back to bisect.
+            return [self.lookup(rate) for rate in rates]
+
+        if self._np_tables is None:
+            self._np_tables = (
+                np.array(self._lows, dtype=np.float64),
+                np.array(self._highs, dtype=np.float64),
+                np.array(self._labels + [self.fallback], dtype=object),
+            )
+        lows, highs, labels = self._np_tables
+
+        rates = np.asarray(rates, dtype=np.float64)
+        idx = np.searchsorted(highs, rates, side='left')
+        in_table = idx < len(highs)
+        safe_idx = np.where(in_table, idx, 0)
+        valid = in_table & (rates > lows[safe_idx])
+        return labels[np.where(valid, idx, len(highs))]
+
+def load_band_ranges(path):
+    """Reads band ranges from a JSON file of [low, high, band] triples."""
+    with open(path, mode='r', encoding='utf-8') as f:
+        ranges = json.load(f)
+    try:
+        return [(float(low), float(high), str(band)) for low, high, band in ranges]
+    except (TypeError, ValueError):
+        raise ValueError(f"{path}: expected a list of [low, high, band] triples") from None
+
+DEFAULT_BAND_INDEX = BandIndex()
@@ -0,0 +1,174 @@
+"""Canonicalization: collapse duplicate rate rows before refinement.
+
+Master files carry several rows per role and region, and the refiners
+resolve them implicitly: `rate_lookup[key] = rate` keeps whichever row came
+last. canonicalize() makes that step explicit and reported. Every row is
+keyed by its normalized (Role, Region, Unit, Currency, Source), meaning
+stripped, whitespace collapsed, case-folded and the currency upper-cased.
+The key is hashed to 16 bytes, so the resident map holds one digest and one
+row per distinct key, not every input row. The input is read in one
+streaming pass.
+
+A row identical, after stripping, to the row currently kept for its key
+is an exact duplicate and dropped silently. Any other row sharing the key
+is a collision, resolved by `policy` (a variant seen earlier counts again,
+so A, B, A under 'latest' keeps A, as the refiners would):
+
+    latest   the last row wins (what the refiners did implicitly)
+    min      the row with the lowest Rate_low
+    max      the row with the highest Rate_low
+    mean     the last row, with Rate_low and Rate_high averaged over the
+             distinct variants
+
+Under every policy a priced row beats a row with no rate, which is left
+for proxy fill. Output rows keep the order in which their keys first
+appeared. Collision counts and a sample of colliding keys go to the run
+report next to the output.
+"""
+import csv
+import hashlib
+import os
+
+from ratecard.ingest import open_rate_file, plan_outputs, run_each
+from ratecard.money import clean_currency
+from ratecard.profiling import RunReport
+
+KEY_COLUMNS = ('Role', 'Region', 'Unit', 'Currency', 'Source')
+RATE_COLUMNS = ('Rate_low', 'Rate_high')
+POLICIES = ('latest', 'min', 'max', 'mean')
+
+# Batch runs name each output after its input.
+CANONICAL_SUFFIX = '_CANONICAL.csv'
+
+# Colliding keys listed in the run report.
+MAX_COLLISION_SAMPLES = 50
+
+def normalize(value, column):
+    value = ' '.join((value or '').split())
+    return value.upper() if column == 'Currency' else value.casefold()
+
+def key_digest(parts):
+    return hashlib.blake2b('\x1f'.join(parts).encode('utf-8'), digest_size=16).digest()
+
+class KeyState:
+    """The kept row for one key, plus what the policy needs to resolve collisions."""
+
+    __slots__ = ('row', 'rate', 'content', 'variants', 'rates')
+
+    def __init__(self, row, rate, content):
+        self.row = row
+        self.rate = rate
+        self.content = content
+        self.variants = {content}
+        self.rates = None  # (Rate_low, Rate_high) of each distinct variant, once the key collides
+
+def pick(policy, kept_rate, new_rate):
+    """True if a colliding row with `new_rate` should replace the kept one."""
+    if new_rate <= 0:
+        return kept_rate <= 0 and policy in ('latest', 'mean')
+    if kept_rate <= 0:
+        return True
+    if policy == 'min':
+        return new_rate < kept_rate
+    if policy == 'max':
+        return new_rate > kept_rate
+    return True  # latest, mean
+
+def canonicalize_file(input_file, output_file, policy='latest'):
+    """Collapses `input_file` to one row per key into `output_file`. Returns the report info, or None."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown conflict policy {policy!r} (expected one of {', '.join(POLICIES)})")
+    if not os.path.exists(input_file):
+        print(f"Error: Could not find {input_file}")
+        return
+
+    report = RunReport()
+    report.start()
+    states = {}
+    rows_in = exact_duplicates = conflicting_rows = 0
+    with open_rate_file(input_file) as rate_file:
+        if not rate_file.headers:
+            print(f"Error: No Role/Region header row in {input_file}")
+            return
+        headers = rate_file.headers
+        index = rate_file.index
+        key_positions = [(index[c] if c in index else None, c) for c in KEY_COLUMNS]
+        rate_positions = [index[c] if c in index else None for c in RATE_COLUMNS]
+
+        with report.stage('collapse') as stage:
+            for row in rate_file.rows():
+                rows_in += 1
+                key = key_digest([normalize(row[i] if i is not None and i < len(row) else '', c)
+                                  for i, c in key_positions])
+                content = key_digest([cell.strip() for cell in row])
+                rate = clean_currency(index.get(row, 'Rate_low', 0))
+
+                state = states.get(key)
+                if state is None:
+                    states[key] = KeyState(row, rate, content)
+                    continue
+                if content == state.content:
+                    exact_duplicates += 1
+                    continue
+
+                conflicting_rows += 1
+                if content not in state.variants:
+                    if state.rates is None:
+                        state.rates = [rate_pair(state.row, rate_positions)]
+                    state.rates.append(rate_pair(row, rate_positions))
+                    state.variants.add(content)
+                if pick(policy, state.rate, rate):
+                    state.row, state.rate, state.content = row, rate, content
+            stage['rows'] = rows_in
+
+    collisions = []
+    with report.stage('write') as stage:
+        with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(headers)
+            for state in states.values():
+                row = state.row
+                if state.rates is not None:
+                    if policy == 'mean':
+                        row = with_mean_rates(row, state.rates, rate_positions)
+                    if len(collisions) < MAX_COLLISION_SAMPLES:
+                        collisions.append({
+                            'key': {c: index.get(state.row, c) for c in KEY_COLUMNS},
+                            'variants': len(state.variants),
+                            'rates': [low for low, _ in state.rates],
+                            'kept': clean_currency(index.get(row, 'Rate_low', 0)),
+                        })
+                writer.writerow(row)
+        stage['rows'] = len(states)
+
+    colliding_keys = sum(1 for state in states.values() if state.rates is not None)
+    report.info.update(mode='canonicalize', input_file=input_file, policy=policy, rows_in=rows_in,
+                       rows_out=len(states), exact_duplicates=exact_duplicates,
+                       colliding_keys=colliding_keys, conflicting_rows=conflicting_rows,
+                       collision_samples=collisions)
+    report.finish()
+
+    print(f"{input_file}: {rows_in} rows -> {len(states)} "
+          f"({exact_duplicates} exact duplicates, {colliding_keys} keys with conflicting rows, policy={policy})")
+    print(f"Run report: {report.write(output_file)}")
+    return report.info
+
+def rate_pair(row, rate_positions):
+    return tuple(clean_currency(row[i]) if i is not None and i < len(row) else 0.0 for i in rate_positions)
+
+def with_mean_rates(row, rates, rate_positions):
+    """`row` with each rate column replaced by its mean over the priced variants."""
+    row = list(row)
+    for column, i in enumerate(rate_positions):
+        priced = [pair[column] for pair in rates if pair[column] > 0]
+        if i is not None and i < len(row) and priced:
+            row[i] = str(round(sum(priced) / len(priced), 2))
+    return row
+
+def canonicalize(inputs, output_file=None, output_dir=None, policy='latest'):
+    """Canonicalizes every file matched by `inputs` (paths or globs).
+
+    Returns {input: output_file or None if it failed}.
+    """
+    jobs = plan_outputs(inputs, CANONICAL_SUFFIX, output_file, output_dir)
+    return run_each(jobs, lambda input_file, target: canonicalize_file(input_file, target, policy))
@@ -0,0 +1,277 @@
+"""Command line for the ratecard package (`python -m ratecard`).
+
+    python -m ratecard refine                      # Master_3000_Rows.csv, as refine_rates_v10
+    python -m ratecard refine 'suppliers/*.csv' --output-dir refined --stream
+    python -m ratecard refine 'markets/*.csv' --shared-lookup --workers 4
+    python -m ratecard refine --fx-file fx.csv --fx-date 2024-06-30
+    python -m ratecard reband GLOBAL_COST_RATES_ENRICHED_FINAL.csv --fx-file fx.csv --dates 2024-01-01,2024-06-30
+    python -m ratecard refine --bands eg_bands.json --proxies-from-grades UK_LON
+    python -m ratecard sweep GLOBAL_COST_RATES_ENRICHED_FINAL.csv --multipliers 2.1:2.6:0.1 --hours 7.5,8
+    python -m ratecard serve GLOBAL_COST_RATES_ENRICHED_FINAL.csv --port 8765
+    python -m ratecard export GLOBAL_COST_RATES_ENRICHED_FINAL.csv --app-id my-app --delta
+    python -m ratecard generate 'truth/*.csv' --raw raw.csv --workers 4
+    python -m ratecard canonicalize Master_3000_Rows.csv --policy max -o master_canonical.csv
+    python -m ratecard grades --grades J,K,L,M,N,O --bands-out eg_bands.json --proxies-base UK_LON
+"""
+import argparse
+import json
+import os
+
+from ratecard import engine
+from ratecard.bands import BandIndex, load_band_ranges
+from ratecard.canonical import POLICIES, canonicalize
+from ratecard.engine import refine, reband
+from ratecard.fx import FxHistory
+from ratecard.generator import RAW_FILE, generate
+from ratecard.grades import PERIODS, load_grade_index
+
+def add_refine_options(parser):
+    """refine_data() options shared by refine_rates_v10.py and `python -m ratecard refine`."""
+    parser.add_argument('--stream', action='store_true', help="two-pass mode with flat memory use")
+    parser.add_argument('--workers', type=int, default=1, help="refine role shards in N processes")
+    parser.add_argument('--engine', choices=['python', 'pandas'], default='python', help="row-by-row or vectorized backend")
+    parser.add_argument('--incremental', action='store_true', help="only refine rows changed since the last run")
+    parser.add_argument('--columnar', action='store_true', help="also write a memory-mappable columnar cache")
+    parser.add_argument('--trace-memory', action='store_true', help="record tracemalloc peaks per stage in the run report")
+    parser.add_argument('--profile', action='store_true', help="capture a cProfile dump next to the output")
+    parser.add_argument('--fx-file', help="dated FX rates (Date,Currency,To_GBP CSV) to band with")
+    parser.add_argument('--fx-date', help="band with the rates in force on this date (default: latest in --fx-file)")
+    add_table_options(parser)
+
+def add_table_options(parser):
+    """--bands/--proxies-from-grades, shared by refine and reband."""
+    parser.add_argument('--bands', metavar='FILE', help="band with these JSON band ranges (e.g. from grades --bands-out)")
+    parser.add_argument('--proxies-from-grades', metavar='BASE',
+                        help="proxy regions the EG sheets cover from BASE (e.g. UK_LON) at the sheets' multipliers")
+
+def load_fx(fx_file, fx_date=None):
+    """The FxTable for --fx-file/--fx-date, or None for the built-in rates."""
+    if not fx_file:
+        if fx_date:
+            raise ValueError("--fx-date needs --fx-file")
+        return None
+    history = FxHistory.load(fx_file)
+    return history.as_of(fx_date) if fx_date else history.latest()
+
+def configure_tables(args):
+    """Builds the engine's BAND_INDEX/PROXY_RESOLVER from --bands and --proxies-from-grades.
+
+    Derived proxies replace the built-in LOCATION_PROXIES entries for the
+    regions the EG sheets cover; the other built-in proxies are kept.
+    """
+    band_ranges = load_band_ranges(args.bands) if args.bands else None
+    location_proxies = None
+    if args.proxies_from_grades:
+        location_proxies = {**engine.LOCATION_PROXIES, **load_grade_index().proxies(args.proxies_from_grades)}
+    engine.configure(band_ranges, location_proxies)
+
+def refine_options(args):
+    """refine_data() keyword arguments from add_refine_options(); raises ValueError on bad FX input.
+
+    Also applies the band and proxy tables (configure_tables()).
+    """
+    configure_tables(args)
+    return dict(streaming=args.stream, workers=args.workers, engine=args.engine, incremental=args.incremental,
+                columnar=args.columnar, trace_memory=args.trace_memory, profile=args.profile,
+                fx=load_fx(args.fx_file, args.fx_date))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m ratecard', description="Refine or generate rate cards.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    refine_parser = commands.add_parser('refine', help="proxy fill, cost, banding and anomaly flags (v10)")
+    refine_parser.add_argument('inputs', nargs='*', help="rate card files or globs (default: Master_3000_Rows.csv)")
+    refine_parser.add_argument('-o', '--output', help="output file (single input only)")
+    refine_parser.add_argument('--output-dir', help="write '<name>_ENRICHED.csv' files here instead of next to each input")
+    refine_parser.add_argument('--shared-lookup', action='store_true',
+                               help="fill proxy gaps from base rates in any of the inputs (workers refine whole files)")
+    add_refine_options(refine_parser)
+
+    generate_parser = commands.add_parser('generate', help="value-based rate generation from truth files (v3)")
+    generate_parser.add_argument('inputs', nargs='*', help="truth files or globs (default: the _ADJUSTED FOR TRUTH file)")
+    generate_parser.add_argument('--raw', default=RAW_FILE, help="raw rate card with the per-country archetypes")
+    generate_parser.add_argument('-o', '--output', help="output file (single input only)")
+    generate_parser.add_argument('--output-dir', help="write '<name>_GENERATED.csv' files here instead of next to each input")
+    generate_parser.add_argument('--workers', type=int, default=1, help="fan role chunks out to N processes")
+    generate_parser.add_argument('--match', choices=['price', 'title'], default='price',
+                                 help="match truth roles to raw rows by UK price (v3) or by fuzzy title, price breaking ties")
+    generate_parser.add_argument('--no-cache', action='store_true', help="parse the raw file even if its archetype cache is current")
+
+    reband_parser = commands.add_parser('reband', help="band a refined card under several dated FX tables at once")
+    reband_parser.add_argument('input', help="refined rate card (e.g. GLOBAL_COST_RATES_ENRICHED_FINAL.csv)")
+    reband_parser.add_argument('--fx-file', required=True, help="dated FX rates (Date,Currency,To_GBP CSV)")
+    reband_parser.add_argument('--dates', help="comma-separated as-of dates (default: every date in --fx-file)")
+    reband_parser.add_argument('-o', '--output', help="output file (default: '<name>_BANDS.csv')")
+    add_table_options(reband_parser)
+
+    sweep_parser = commands.add_parser('sweep', help="cost/band summary of a refined card under a grid of scenarios")
+    sweep_parser.add_argument('input', help="refined rate card (e.g. GLOBAL_COST_RATES_ENRICHED_FINAL.csv)")
+    sweep_parser.add_argument('--multipliers', help="price-to-cost multipliers, e.g. 2.1,2.35 or 2.1:2.6:0.1")
+    sweep_parser.add_argument('--hours', help="hours per day, e.g. 7.5,8")
+    sweep_parser.add_argument('--fx-file', help="dated FX rates (Date,Currency,To_GBP CSV)")
+    sweep_parser.add_argument('--fx-dates', help="comma-separated as-of dates (default: every date in --fx-file)")
+    sweep_parser.add_argument('--bands', action='append', default=[], metavar='FILE',
+                              help="JSON band ranges [[low, high, band], ...]; repeat for several")
+    sweep_parser.add_argument('-o', '--output', help="summary CSV (default: '<name>_SCENARIOS.csv')")
+    sweep_parser.add_argument('--per-scenario-dir', help="also write each scenario's per-row results here")
+
+    serve_parser = commands.add_parser('serve', help="JSON lookups over a refined card (see ratecard.service)")
+    serve_parser.add_argument('input', help="refined rate card (e.g. GLOBAL_COST_RATES_ENRICHED_FINAL.csv)")
+    serve_parser.add_argument('--host', default='127.0.0.1', help="interface to listen on")
+    serve_parser.add_argument('--port', type=int, default=8765, help="port to listen on")
+    serve_parser.add_argument('--fx-file', help="dated FX rates for hourly GBP and conversions (default: built-in)")
+    serve_parser.add_argument('--fx-date', help="use the rates in force on this date (default: latest in --fx-file)")
+
+    export_parser = commands.add_parser('export', help="upload a refined card to Firestore (see ratecard.export)")
+    export_parser.add_argument('input', help="refined rate card (e.g. GLOBAL_COST_RATES_ENRICHED_FINAL.csv)")
+    export_parser.add_argument('--app-id', default='default-app-id', help="writes to artifacts/<app-id>/public/data/cost_rates")
+    export_parser.add_argument('--project', help="Google Cloud project (default: from the environment)")
+    export_parser.add_argument('--batch-size', type=int, default=450, help="writes per batch (Firestore allows 500)")
+    export_parser.add_argument('--concurrency', type=int, default=8, help="batches in flight at once")
+    export_parser.add_argument('--retries', type=int, default=5, help="retries per batch on transient errors")
+    export_parser.add_argument('--restart', action='store_true', help="ignore the checkpoint of an interrupted export")
+    export_parser.add_argument('--delta', action='store_true',
+                               help="only write documents changed since the last export of this card (and delete removed ones)")
+    export_parser.add_argument('--dry-run', action='store_true', help="build the batches without writing anything")
+
+    canonical_parser = commands.add_parser('canonicalize', help="collapse duplicate Role/Region/Unit/Currency/Source rows")
+    canonical_parser.add_argument('inputs', nargs='+', help="rate card files or globs")
+    canonical_parser.add_argument('-o', '--output', help="output file (single input only)")
+    canonical_parser.add_argument('--output-dir', help="write '<name>_CANONICAL.csv' files here instead of next to each input")
+    canonical_parser.add_argument('--policy', choices=POLICIES, default='latest',
+                                  help="which row wins when rows share a key but differ (default: latest, as the refiners do)")
+
+    grades_parser = commands.add_parser('grades', help="grade x location costs, bands and proxies from the EG sheets")
+    grades_parser.add_argument('inputs', nargs='*', help="EG band sheets (default: the 'EG bands a/b' files)")
+    grades_parser.add_argument('--period', choices=PERIODS, default='hour',
+                               help="cost period to show and band on")
+    grades_parser.add_argument('--location', default='UK_LON', help="location whose costs set the band thresholds")
+    grades_parser.add_argument('--grades', help="comma-separated grades to band (default: every grade at --location)")
+    grades_parser.add_argument('--bands-out', help="write the derived band ranges as JSON (for refine/reband/sweep --bands)")
+    grades_parser.add_argument('--proxies-base', help="print location multipliers relative to this location")
+    grades_parser.add_argument('--no-cache', action='store_true', help="reparse the sheets even if their caches are current")
+
+    args = parser.parse_args(argv)
+    if args.command == 'grades':
+        try:
+            return run_grades(args)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    if args.command == 'export':
+        return run_export(args, parser)
+
+    if args.command == 'serve':
+        from ratecard.query import RateIndex
+        from ratecard.service import serve
+        try:
+            fx = load_fx(args.fx_file, args.fx_date) or engine.FX_TABLE
+            index = RateIndex.from_csv(args.input, fx=fx)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        serve(index, args.host, args.port, source=args.input)
+        return 0
+
+    if args.command == 'sweep':
+        try:
+            return run_sweep(args)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    if args.command == 'reband':
+        try:
+            history = FxHistory.load(args.fx_file)
+            tables = [history.as_of(d) for d in args.dates.split(',')] if args.dates else history.tables
+            configure_tables(args)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        print(f"Bands under {len(tables)} FX tables: {reband(args.input, tables, args.output)}")
+        return 0
+
+    if args.output and len(args.inputs) > 1:
+        parser.error("--output needs exactly one input")
+
+    inputs = args.inputs or None
+    try:
+        if args.command == 'canonicalize':
+            results = canonicalize(inputs, args.output, args.output_dir, args.policy)
+        elif args.command == 'refine':
+            results = refine(inputs, args.output, args.output_dir, args.shared_lookup, **refine_options(args))
+        else:
+            results = generate(inputs, args.raw, args.output, args.output_dir, args.workers, not args.no_cache,
+                               args.match)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    failed = [name for name, output in results.items() if output is None]
+    if len(results) > 1:
+        print(f"--- {len(results) - len(failed)} of {len(results)} files done ---")
+        for name in failed:
+            print(f"Failed: {name}")
+    return 1 if failed or not results else 0
+
+def run_export(args, parser):
+    from ratecard.export import export_rates
+
+    if not 1 <= args.batch_size <= 500:
+        parser.error("--batch-size must be between 1 and 500")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    try:
+        ok = export_rates(args.input, args.app_id, args.project, args.batch_size, args.concurrency,
+                          args.retries, args.restart, args.delta, args.dry_run)
+    except ImportError as e:
+        parser.error(str(e))
+    return 0 if ok else 1
+
+def run_grades(args):
+    index = load_grade_index(args.inputs or None, use_cache=not args.no_cache)
+    print(f"{len(index)} grade x location costs ({args.period}):")
+    print(f"  {'Grade':<6}" + ''.join(f"{location:>12}" for location in index.locations))
+    for grade, *costs in index.grid(args.period):
+        print(f"  {grade:<6}" + ''.join(f"{cost:>12,.2f}" if cost is not None else f"{'-':>12}" for cost in costs))
+
+    grades = [g.strip() for g in args.grades.split(',')] if args.grades else None
+    ranges = index.band_ranges(args.location, grades, args.period)
+    print(f"Bands from {args.location} {args.period} costs:")
+    for low, high, band in ranges:
+        print(f"  {band:<4} {low:>9,.2f} < rate <= {high:,.2f}")
+    if args.bands_out:
+        with open(args.bands_out, mode='w', encoding='utf-8') as f:
+            json.dump(ranges, f, indent=1)
+        print(f"Band ranges: {args.bands_out}")
+
+    if args.proxies_base:
+        print(f"Location multipliers relative to {args.proxies_base}:")
+        for region, proxy in index.proxies(args.proxies_base).items():
+            print(f"  {region:<10} {proxy['base']} x {proxy['mult']}")
+    return 0
+
+def run_sweep(args):
+    from ratecard.scenarios import SCENARIOS_SUFFIX, SweepInputs, parse_values, scenario_grid, sweep, write_summary
+
+    multipliers = parse_values(args.multipliers) if args.multipliers else [engine.PRICE_TO_COST_MULTIPLIER]
+    hours = parse_values(args.hours) if args.hours else [engine.HOURS_PER_DAY]
+    if args.fx_file:
+        history = FxHistory.load(args.fx_file)
+        fx_tables = [history.as_of(d) for d in args.fx_dates.split(',')] if args.fx_dates else history.tables
+    elif args.fx_dates:
+        raise ValueError("--fx-dates needs --fx-file")
+    else:
+        fx_tables = [engine.FX_TABLE]
+    band_indexes = [(os.path.splitext(os.path.basename(path))[0], BandIndex(load_band_ranges(path)))
+                    for path in args.bands] or [('default', engine.BAND_INDEX)]
+
+    scenarios = scenario_grid(multipliers, hours, fx_tables, band_indexes)
+    inputs = SweepInputs.from_card(args.input)
+    print(f"Sweeping {len(scenarios)} scenarios over {len(inputs)} rows of {args.input}...")
+    summary = sweep(inputs, scenarios, args.per_scenario_dir)
+
+    for entry in summary:
+        bands = ' '.join(f"{band}={count}" for band, count in entry['band_counts'].items())
+        print(f"  {entry['scenario']:<50} cost_gbp={entry['total_estimated_cost_gbp']:>14,.2f} "
+              f"anomalies={entry['anomalies']:<6} {bands}")
+    output = args.output or os.path.splitext(args.input)[0] + SCENARIOS_SUFFIX
+    print(f"Summary: {write_summary(summary, output)}")
+    return 0
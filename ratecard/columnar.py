@@ -0,0 +1,155 @@
+"""Columnar binary cache for refined rate cards.
+
+A refined CSV is exported to a directory of NumPy `.npy` files next to it
+(GLOBAL_COST_RATES_ENRICHED_FINAL.csv -> GLOBAL_COST_RATES_ENRICHED_FINAL.cols/):
+
+    meta.json            row count, column names and dictionary categories
+    Rate_low.npy ...     float64 columns
+    Role.codes.npy ...   int32 codes into the column's categories
+
+The loader memory-maps every array, so opening a multi-million-row rate card
+costs a few file opens instead of a full CSV parse; pages are only read when
+a column is actually touched.
+"""
+import csv
+import json
+import os
+import shutil
+from array import array
+
+import numpy as np
+
+from ratecard.money import clean_currency
+
+COLUMNAR_SUFFIX = '.cols'
+COLUMNAR_VERSION = 2
+
+FLOAT_COLUMNS = ['Rate_low', 'Rate_high', 'Estimated_Cost']
+DICT_COLUMNS = ['Role', 'Region', 'Unit', 'Currency', 'Band']
+
+def columnar_path(csv_path):
+    """Default cache directory for a CSV: same name, COLUMNAR_SUFFIX extension."""
+    return os.path.splitext(csv_path)[0] + COLUMNAR_SUFFIX
+
+def write_columnar(csv_path, out_dir=None):
+    """Exports the refined CSV at `csv_path` to a columnar cache directory.
+
+    Returns the directory path. Columns missing from the CSV are skipped.
+    """
+    out_dir = out_dir or columnar_path(csv_path)
+
+    with open(csv_path, mode='r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])
+        float_idx = [(name, headers.index(name)) for name in FLOAT_COLUMNS if name in headers]
+        dict_idx = [(name, headers.index(name)) for name in DICT_COLUMNS if name in headers]
+
+        floats = {name: array('d') for name, _ in float_idx}
+        codes = {name: array('i') for name, _ in dict_idx}
+        categories = {name: {} for name, _ in dict_idx}
+
+        num_rows = 0
+        for row in reader:
+            if not row:
+                continue
+            for name, i in float_idx:
+                floats[name].append(clean_currency(row[i]) if i < len(row) else 0.0)
+            for name, i in dict_idx:
+                value = row[i] if i < len(row) else ''
+                seen = categories[name]
+                code = seen.get(value)
+                if code is None:
+                    code = seen[value] = len(seen)
+                codes[name].append(code)
+            num_rows += 1
+
+    # The cache is built in a sibling temp directory and swapped in whole. A
+    # rebuild never rewrites the .npy files a live RateCardColumns has mapped;
+    # the old directory is renamed aside and removed, and on POSIX its mapped
+    # files stay readable until they are unmapped.
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        for name, values in floats.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.frombuffer(values, dtype=np.float64))
+        for name, values in codes.items():
+            np.save(os.path.join(tmp_dir, f"{name}.codes.npy"), np.frombuffer(values, dtype=np.intc).astype(np.int32))
+
+        meta = {
+            'version': COLUMNAR_VERSION,
+            'source': os.path.basename(csv_path),
+            'rows': num_rows,
+            'float_columns': list(floats),
+            'dict_columns': {name: list(seen) for name, seen in categories.items()},
+        }
+        with open(os.path.join(tmp_dir, 'meta.json'), mode='w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        old_dir = tmp_dir + '.old'
+        if os.path.exists(out_dir):
+            os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+class RateCardColumns:
+    """Memory-mapped view of a columnar rate card written by write_columnar()."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, 'meta.json'), mode='r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != COLUMNAR_VERSION:
+            raise ValueError(f"Unsupported columnar cache version {meta.get('version')} in {path}")
+
+        self.path = path
+        self.num_rows = meta['rows']
+        self.categories = meta['dict_columns']
+        self.float_columns = meta['float_columns']
+        self._arrays = {}
+        for name in self.float_columns:
+            self._arrays[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        for name in self.categories:
+            self._arrays[name] = np.load(os.path.join(path, f"{name}.codes.npy"), mmap_mode='r')
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def __getitem__(self, name):
+        """Float values for a float column, int32 codes for a dictionary column."""
+        return self._arrays[name]
+
+    def code_for(self, name, value):
+        """Code of `value` in dictionary column `name`, or -1 if it never occurs."""
+        try:
+            return self.categories[name].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, name):
+        """Materializes a dictionary column as an object array of strings."""
+        labels = np.array(self.categories[name], dtype=object)
+        return labels[self._arrays[name]]
+
+def load_or_build_columnar(csv_path):
+    """Opens the columnar cache of `csv_path`, (re)building it if missing or older than the CSV."""
+    cache = columnar_path(csv_path)
+    try:
+        columns = RateCardColumns(cache)
+        if os.path.getmtime(os.path.join(cache, 'meta.json')) >= os.path.getmtime(csv_path):
+            return columns
+    except (OSError, ValueError):
+        pass
+    return RateCardColumns(write_columnar(csv_path, cache))
+
+def load_columnar(path):
+    """Opens a columnar cache; `path` may be the cache directory or its source CSV."""
+    if path.endswith('.csv'):
+        path = columnar_path(path)
+    return RateCardColumns(path)
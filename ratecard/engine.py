@@ -0,0 +1,852 @@
+"""The v10 refinement engine: proxy fill, cost, currency/unit-aware banding.
+
+refine_data() refines one rate card (in memory, streaming, parallel,
+incremental or through the pandas engine in ratecard.vectorized). refine()
+runs it over many files and globs in one process, so the band tables, the
+money-parser cache and the imports are set up once for the whole batch.
+"""
+import csv
+import hashlib
+import heapq
+import io
+import json
+import os
+import zlib
+from collections import ChainMap
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
+
+from ratecard.bands import BAND_RANGES, BandIndex
+from ratecard.fx import FxTable
+from ratecard.ingest import content_hash, open_rate_file, plan_outputs, run_each
+from ratecard.money import clean_currency
+from ratecard.profiling import RunReport
+from ratecard.proxies import ProxyResolver
+from ratecard.rows import RowSchema
+
+# --- CONFIGURATION ---
+INPUT_FILE = 'Master_3000_Rows.csv' 
+OUTPUT_FILE = 'GLOBAL_COST_RATES_ENRICHED_FINAL.csv'
+
+PRICE_TO_COST_MULTIPLIER = 2.35 
+HOURS_PER_DAY = 8.0 
+
+# Exchange Rates to GBP (Base for Banding Calculations)
+# We use these ONLY to determine the Band. The output rate remains in local currency.
+EXCHANGE_RATES = {
+    'GBP': 1.0,
+    'USD': 0.79,
+    'EUR': 0.86,
+    'BRL': 0.14,
+    'CNY': 0.11,
+    'CAD': 0.59,
+    'CHF': 0.90,
+    'AUD': 0.52,
+    'MXN': 0.04,
+    'PLN': 0.20,
+    'INR': 0.0095,
+    # Fallback
+    'DEFAULT': 1.0 
+}
+
+# Default FX table; dated tables can be loaded with ratecard.fx.FxHistory.
+FX_TABLE = FxTable(EXCHANGE_RATES)
+
+# Banding Logic (Hourly Rate Ranges in GBP) - see ratecard.bands.BAND_RANGES
+BAND_INDEX = BandIndex(BAND_RANGES)
+
+# Location Proxies
+# A base region may itself be proxied; chains are followed (see ratecard.proxies).
+LOCATION_PROXIES = {
+    'US-SEA': {'base': 'US-NYC', 'mult': 0.95}, 
+    'US-AUS': {'base': 'US-NYC', 'mult': 0.85},
+    'EU-ES':  {'base': 'UK-LON', 'mult': 0.75}, 
+    'APAC-PH':{'base': 'APAC-IN', 'mult': 1.10},
+}
+PROXY_RESOLVER = ProxyResolver(LOCATION_PROXIES)
+
+# Batch runs name each output after its input; a shared-lookup batch writes
+# one run report for all files.
+ENRICHED_SUFFIX = '_ENRICHED.csv'
+BATCH_REPORT_NAME = 'refine_batch'
+
+# reband() writes the bands under each FX scenario next to the refined card,
+# after these columns of the card (those it has).
+BANDS_SUFFIX = '_BANDS.csv'
+BANDS_COLUMNS = ('Role', 'Region', 'Currency', 'Rate_low', 'Band')
+
+# Incremental mode keeps per-row results next to the output file.
+# Bump STATE_VERSION whenever enrich_row() changes meaning.
+STATE_SUFFIX = '.state.json'
+STATE_VERSION = 3
+
+def get_band_from_rate(hourly_rate_gbp):
+    return BAND_INDEX.lookup(hourly_rate_gbp)
+
+def configure(band_ranges=None, location_proxies=None, price_to_cost_multiplier=None, hours_per_day=None):
+    """Replaces the band ranges, location proxies, cost multiplier and/or hours per day.
+
+    `band_ranges` is a BAND_RANGES-style list of (low, high, band) and
+    `location_proxies` a LOCATION_PROXIES-style dict, e.g. derived from the EG
+    sheets by ratecard.grades. None keeps the current value. Both tables are
+    checked before either is replaced. Pool workers are configured with the
+    parent's settings() through their initializer.
+    """
+    global BAND_RANGES, BAND_INDEX, LOCATION_PROXIES, PROXY_RESOLVER, PRICE_TO_COST_MULTIPLIER, HOURS_PER_DAY
+    band_index = BandIndex(band_ranges) if band_ranges is not None else BAND_INDEX
+    resolver = ProxyResolver(location_proxies) if location_proxies is not None else PROXY_RESOLVER
+    if band_ranges is not None:
+        BAND_RANGES = [tuple(band) for band in band_ranges]
+    if location_proxies is not None:
+        LOCATION_PROXIES = dict(location_proxies)
+    BAND_INDEX = band_index
+    PROXY_RESOLVER = resolver
+    if price_to_cost_multiplier is not None:
+        PRICE_TO_COST_MULTIPLIER = price_to_cost_multiplier
+    if hours_per_day is not None:
+        HOURS_PER_DAY = hours_per_day
+
+def settings():
+    """configure() arguments reproducing this process's current settings."""
+    return BAND_RANGES, LOCATION_PROXIES, PRICE_TO_COST_MULTIPLIER, HOURS_PER_DAY
+
+def open_card(input_file):
+    """Opens `input_file` as a RateFile with the script's error reporting; None on failure.
+
+    A refine pass takes the header and every data row from this one RateFile,
+    so the junk preamble is scanned once.
+    """
+    if not os.path.exists(input_file):
+        print(f"Error: Could not find {input_file}")
+        return None
+
+    try:
+        rate_file = open_rate_file(input_file)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return None
+
+    if not rate_file.headers:
+        rate_file.close()
+        print("Error: Could not find a valid header row containing 'Role' and 'Region'.")
+        return None
+    print(f"Found valid headers on Line {rate_file.header_line+1}: {rate_file.headers}")
+    return rate_file
+
+def add_to_lookup(rate_lookup, row, index, regions=None):
+    """Records the row's Rate_low under 'role|region'. Later rows win, as before.
+
+    If `regions` is given, only those regions are kept (the streaming mode only
+    needs the proxy base regions resident).
+    """
+    role = index.get(row, 'Role').strip()
+    region = index.get(row, 'Region').strip()
+    if regions is not None and region not in regions:
+        return
+    rate = clean_currency(index.get(row, 'Rate_low', 0))
+    if rate > 0:
+        key = f"{role}|{region}"
+        rate_lookup[key] = rate
+
+def get_output_headers(headers):
+    new_headers = ['Estimated_Cost', 'Band', 'Anomaly_Flag']
+    final_headers = list(headers)
+    for h in new_headers:
+        if h not in final_headers:
+            final_headers.append(h)
+    return final_headers
+
+def enrich_row(row, proxies, fx=FX_TABLE):
+    """Fills proxy gaps, cost, band and anomaly flag on a RateRow in place.
+
+    `proxies` is PROXY_RESOLVER bound to the file's rate lookup and `fx` the
+    FxTable used for banding. Returns True if the rate was filled from a proxy
+    region.
+    """
+    used_proxy = False
+
+    role = row.role
+    region = row.region
+    unit = row.unit.strip().lower() 
+    currency = row.currency.strip().upper() # Get Currency
+    rate_low = clean_currency(row.rate_low)
+    
+    notes = row.notes
+    anomaly = ""
+
+    # A. FILL GAPS WITH PROXIES
+    if rate_low == 0 and region in PROXY_RESOLVER:
+        resolved = proxies.resolve(role, region)
+        
+        if resolved is not None:
+            proxy_rate, proxy_note = resolved
+            new_rate = round(proxy_rate, 2)
+            
+            row.rate_low = new_rate
+            row.rate_high = new_rate 
+            rate_low = new_rate
+            
+            notes = f"{notes} | {proxy_note}"
+            used_proxy = True
+        else:
+             notes = f"{notes} | {proxies.missing_note(region)}"
+
+    # B. CALCULATE COST
+    if rate_low > 0:
+        estimated_cost = round(rate_low / PRICE_TO_COST_MULTIPLIER, 2)
+    else:
+        estimated_cost = 0
+    row.estimated_cost = estimated_cost
+
+    # C. AUTO-BANDING (CURRENCY & UNIT AWARE)
+    if rate_low > 0:
+        # 1. Get Exchange Rate
+        exchange_mult = fx.to_gbp_rate(currency)
+        
+        # 2. Convert to GBP
+        rate_in_gbp = rate_low * exchange_mult
+        
+        # 3. Normalize to Hourly if Day rate
+        rate_for_banding = rate_in_gbp
+        if 'day' in unit:
+             rate_for_banding = rate_in_gbp / HOURS_PER_DAY
+        
+        row.band = get_band_from_rate(rate_for_banding)
+    else:
+        row.band = 'Unknown'
+
+    # D. ANOMALY DETECTION
+    if estimated_cost > rate_low and rate_low > 0:
+        anomaly = "Cost > Price"
+    
+    row.notes = notes.strip(' |')
+    row.anomaly_flag = anomaly
+    
+    return used_proxy
+
+def proxy_source(row, index, proxies):
+    """Returns the [rate, note] a row's proxy fill would use, or None."""
+    region = index.get(row, 'Region')
+    if region in PROXY_RESOLVER and clean_currency(index.get(row, 'Rate_low', 0)) == 0:
+        resolved = proxies.resolve(index.get(row, 'Role'), region)
+        return list(resolved) if resolved else None
+    return None
+
+def row_hash(row):
+    """Stable 16-hex-digit digest of a row's cells."""
+    return hashlib.blake2b('\x1f'.join(row).encode('utf-8'), digest_size=8).hexdigest()
+
+def config_fingerprint(final_headers, fx=FX_TABLE):
+    """Everything besides the row itself that enrich_row()'s output depends on."""
+    config = [STATE_VERSION, PRICE_TO_COST_MULTIPLIER, HOURS_PER_DAY, fx.as_dict(),
+              BAND_RANGES, LOCATION_PROXIES, final_headers]
+    return hashlib.blake2b(json.dumps(config, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+
+def output_signature(output_file):
+    """[size, mtime_ns] of an output file, or None if it does not exist."""
+    try:
+        stat = os.stat(output_file)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def load_state(state_file, fingerprint, output_file):
+    """Returns the previous run's state, or {} if missing, stale or its output was modified since."""
+    try:
+        with open(state_file, mode='r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if state.get('fingerprint') != fingerprint:
+        print("Refinement settings changed since the last run; refining every row.")
+        return {}
+    if state.get('output') != output_signature(output_file):
+        print(f"{output_file} changed since the last run; refining every row.")
+        return {}
+    return state
+
+def shard_for_role(role, num_shards):
+    """Stable shard number for a role, so every region of a role lands together."""
+    return zlib.crc32(role.strip().encode('utf-8')) % num_shards
+
+def refine_shard(headers, final_headers, shard, fx=FX_TABLE):
+    """Process-pool worker: refines one shard of (row number, row tuple) pairs.
+
+    Every region of a role is in the same shard, so the shard's own lookup is
+    all the proxy step needs. Returns ([(row number, output values,
+    used_proxy)] in input order, currencies `fx` had no rate for). The
+    worker's `fx` is a copy, so its `unknown` set has to be sent back.
+    """
+    schema = RowSchema(headers)
+    to_values = schema.writer_for(final_headers)
+    rate_lookup = {}
+    for _, row in shard:
+        add_to_lookup(rate_lookup, row, schema.index)
+
+    proxies = PROXY_RESOLVER.bind(rate_lookup)
+
+    results = []
+    for row_number, row in shard:
+        record = schema.make_row(row)
+        used_proxy = enrich_row(record, proxies, fx)
+        results.append((row_number, to_values(record), used_proxy))
+    return results, fx.unknown
+
+def refine_data(input_file=None, output_file=None, streaming=False, workers=1, engine='python',
+                incremental=False, columnar=False, trace_memory=False, profile=False, fx=None):
+    """Refines `input_file` into `output_file`. Returns True on success.
+
+    The files default to INPUT_FILE and OUTPUT_FILE as set when called.
+    `streaming`, `workers > 1`, `engine='pandas'` and `incremental` are
+    separate modes; combining two of them raises ValueError.
+
+    With `streaming=True` the input is read twice instead of being held in
+    memory: pass 1 builds the role|region lookup (proxy base regions only),
+    pass 2 enriches each row and writes it straight to the output. Peak memory
+    then depends on the number of base-region roles, not on the file size.
+
+    With `workers > 1` the rows are sharded by Role and each shard is refined
+    in a separate process; results are merged back in the original row order.
+
+    With `engine='pandas'` the whole file is refined column-at-a-time by
+    ratecard.vectorized (needs pandas/NumPy); the output is byte-identical.
+
+    With `incremental=True` a sidecar state file (`output_file` + STATE_SUFFIX)
+    records the input's content hash, a hash of every row and where each
+    row's output sits in the output file. A rerun on an unchanged input
+    returns straight away. Otherwise only rows that are new or changed, plus
+    proxied rows whose base rate changed, are refined; the other rows are
+    copied from the previous output, which is only rewritten if a row changed.
+
+    With `columnar=True` the output is also exported to a memory-mappable
+    columnar cache (see ratecard.columnar, needs NumPy).
+
+    `fx` is the FxTable used for banding (default FX_TABLE), e.g. a dated
+    table from ratecard.fx.FxHistory.as_of().
+
+    Every successful run writes a JSON run report (`output_file` +
+    REPORT_SUFFIX) with per-stage timings, row throughput and peak RSS.
+    `trace_memory` adds tracemalloc peaks per stage and `profile` a cProfile
+    dump of the whole run.
+    """
+    if engine not in ('python', 'pandas'):
+        raise ValueError(f"Unknown engine {engine!r} (expected 'python' or 'pandas')")
+    modes = [name for name, on in (('streaming', streaming), ('workers', workers > 1),
+                                   ('engine=pandas', engine == 'pandas'), ('incremental', incremental)) if on]
+    if len(modes) > 1:
+        raise ValueError(f"refine_data does not support combining: {', '.join(modes)}")
+    input_file = input_file or INPUT_FILE
+    output_file = output_file or OUTPUT_FILE
+    fx = fx or FX_TABLE
+    fx.unknown.clear()
+    report = RunReport(trace_memory=trace_memory, profile=profile)
+    report.info.update(input_file=input_file, output_file=output_file, fx=fx.name)
+    report.start()
+
+    if engine == 'pandas':
+        from ratecard import vectorized
+        report.info['mode'] = 'pandas'
+        ok = vectorized.refine_data(input_file, output_file, report, fx)
+    else:
+        if incremental:
+            report.info['mode'] = label = 'incremental'
+        elif workers > 1:
+            report.info.update(mode='parallel', workers=workers)
+            label = f"{workers} workers"
+        else:
+            report.info['mode'] = label = 'streaming' if streaming else 'in-memory'
+        print(f"--- Starting Data Refinement (v10 - Currency & Unit Aware, {label}) on {input_file} ---")
+
+        # FIND HEADERS WITH SMART HEADER DETECTION; every pass reads this one RateFile.
+        with report.stage('header'):
+            rate_file = open_card(input_file)
+        ok = None
+        if rate_file is not None:
+            with rate_file:
+                if incremental:
+                    ok = refine_data_incremental(rate_file, output_file, report, fx)
+                elif workers > 1:
+                    ok = refine_data_parallel(rate_file, output_file, workers, report, fx)
+                else:
+                    ok = refine_data_serial(rate_file, output_file, streaming, report, fx)
+    report_unknown_currencies(fx, report)
+
+    if ok and columnar:
+        from ratecard.columnar import write_columnar
+        with report.stage('columnar') as stage:
+            print(f"Columnar cache: {write_columnar(output_file)}")
+            stage['rows'] = report.info.get('rows')
+
+    report.finish()
+    if ok:
+        print(f"Timings: {report.summary()}")
+        print(f"Run report: {report.write(output_file)}")
+    return ok
+
+def report_unknown_currencies(fx, report):
+    """Warns about currencies `fx` had no rate for (banded at its fallback)."""
+    if fx.unknown:
+        unknown = sorted(fx.unknown)
+        report.info['fx_unknown_currencies'] = unknown
+        print(f"Warning: no FX rate for {', '.join(repr(c) for c in unknown)}; banded at x{fx.fallback}.")
+
+def print_success(output_file, count_rows, count_proxies, report):
+    report.info.update(rows=count_rows, proxies_filled=count_proxies)
+    print(f"--- SUCCESS ---")
+    print(f"Generated: {output_file}")
+    print(f"Total Rows: {count_rows}")
+    print(f"Filled {count_proxies} gaps using proxies.")
+
+def refine_data_serial(rate_file, output_file, streaming, report, fx=FX_TABLE):
+    headers = rate_file.headers
+
+    # 1. READ DATA & BUILD LOOKUP MAP
+    schema = RowSchema(headers)
+    rate_lookup = {}
+    rows = []
+    row_count = 0
+    base_regions = PROXY_RESOLVER.base_regions if streaming else None
+    try:
+        with report.stage('read_lookup') as stage:
+            for row in rate_file.rows():
+                add_to_lookup(rate_lookup, row, schema.index, base_regions)
+                if not streaming:
+                    rows.append(schema.make_row(row))
+                row_count += 1
+            stage['rows'] = row_count
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return
+
+    print(f"Loaded {row_count} data rows.")
+
+    # 2. DEFINE OUTPUT HEADERS
+    final_headers = get_output_headers(headers)
+    to_values = schema.writer_for(final_headers)
+    proxies = PROXY_RESOLVER.bind(rate_lookup)
+
+    # 3. PROCESS ROWS
+    # In memory, proxy/cost/band/anomaly run as their own stage before the
+    # write; streaming has to interleave them with reading and writing.
+    count_proxies = 0
+    if streaming:
+        source = map(schema.make_row, rate_file.rows())
+    else:
+        source = rows
+        with report.stage('enrich') as stage:
+            for record in rows:
+                count_proxies += enrich_row(record, proxies, fx)
+            stage['rows'] = row_count
+
+    # 4. WRITE OUTPUT
+    count_rows = 0
+    try:
+        with report.stage('read_enrich_write' if streaming else 'write') as stage:
+            with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(final_headers)
+                for record in source:
+                    if streaming:
+                        count_proxies += enrich_row(record, proxies, fx)
+                    writer.writerow(to_values(record))
+                    count_rows += 1
+            stage['rows'] = count_rows
+        print_success(output_file, count_rows, count_proxies, report)
+        return True
+    except Exception as e:
+        print(f"Error writing file: {e}")
+
+def refine_data_parallel(rate_file, output_file, workers, report, fx=FX_TABLE):
+    headers = rate_file.headers
+
+    # 1. READ DATA INTO ROLE SHARDS
+    # Rows travel to the workers as plain tuples, which pickle much
+    # cheaper than dicts.
+    index = rate_file.index
+    shards = [[] for _ in range(workers)]
+    row_count = 0
+    try:
+        with report.stage('read_shard') as stage:
+            for row_number, row in enumerate(rate_file.rows()):
+                shard = shards[shard_for_role(index.get(row, 'Role') or '', workers)]
+                shard.append((row_number, row))
+                row_count += 1
+            stage['rows'] = row_count
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return
+
+    print(f"Loaded {row_count} data rows into {workers} role shards.")
+
+    # 2. DEFINE OUTPUT HEADERS
+    final_headers = get_output_headers(headers)
+
+    # 3. PROCESS SHARDS & MERGE IN ORIGINAL ORDER
+    with report.stage('refine_shards') as stage:
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure,
+                                 initargs=settings()) as pool:
+            futures = [pool.submit(refine_shard, headers, final_headers, shard, fx) for shard in shards if shard]
+            del shards
+            results = []
+            for future in futures:
+                rows, unknown = future.result()
+                results.append(rows)
+                fx.unknown.update(unknown)
+        stage['rows'] = row_count
+
+    count_rows = 0
+    count_proxies = 0
+    try:
+        with report.stage('merge_write') as stage:
+            with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(final_headers)
+                for _, values, used_proxy in heapq.merge(*results, key=itemgetter(0)):
+                    writer.writerow(values)
+                    count_rows += 1
+                    count_proxies += used_proxy
+            stage['rows'] = count_rows
+        print_success(output_file, count_rows, count_proxies, report)
+        return True
+    except Exception as e:
+        print(f"Error writing file: {e}")
+
+def refine_data_incremental(rate_file, output_file, report, fx=FX_TABLE):
+    headers = rate_file.headers
+
+    # 1. LOAD PREVIOUS STATE
+    # The state holds each row's hash and the byte span of its output in the
+    # previous output file, which is reused rather than cached a second time.
+    final_headers = get_output_headers(headers)
+    fingerprint = config_fingerprint(final_headers, fx)
+    state_file = output_file + STATE_SUFFIX
+    with report.stage('load_state') as stage:
+        state = load_state(state_file, fingerprint, output_file)
+        input_hash = content_hash(rate_file.path)
+        stage['rows'] = state.get('rows', 0)
+
+    if state.get('input_hash') == input_hash:
+        fx.unknown.update(state['fx_unknown'])
+        report.info.update(rows_refined=0, rows_reused=state['rows'])
+        print(f"Input unchanged since the last run; {output_file} is up to date.")
+        print_success(output_file, state['rows'], state['proxies'], report)
+        return True
+
+    # 2. READ DATA & BUILD LOOKUP MAP
+    schema = RowSchema(headers)
+    index = schema.index
+    rate_lookup = {}
+    rows = []
+    try:
+        with report.stage('read_lookup') as stage:
+            for row in rate_file.rows():
+                add_to_lookup(rate_lookup, row, index)
+                rows.append(row)
+            stage['rows'] = len(rows)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return
+
+    print(f"Loaded {len(rows)} data rows.")
+
+    # 3. REUSE PREVIOUS OUTPUT ROWS, REFINE THE REST
+    # A previous row is reused while its content is unchanged and, for
+    # proxied rows, the proxy rate and chain it was derived from are the same.
+    previous = b''
+    if state:
+        with open(output_file, mode='rb') as f:
+            previous = f.read()
+    previous_hashes = state.get('hashes', '')
+    previous_rows = {}
+    for j in range(len(previous_hashes) // 16):
+        previous_rows.setdefault(previous_hashes[16 * j:16 * j + 16], j)
+    offsets = state.get('offsets', [])
+    bases = state.get('bases', {})
+
+    to_values = schema.writer_for(final_headers)
+    proxies = PROXY_RESOLVER.bind(rate_lookup)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take_buffer():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text.encode('utf-8')
+
+    writer.writerow(final_headers)
+    chunks = [take_buffer()]
+    new_offsets = [len(chunks[0])]
+    hashes = []
+    new_bases = {}
+    count_proxies = 0
+    count_refined = 0
+    unchanged = bool(state) and len(rows) == state['rows']
+    with report.stage('enrich') as stage:
+        for i, row in enumerate(rows):
+            key = row_hash(row)
+            base_rate = proxy_source(row, index, proxies)
+
+            j = previous_rows.get(key)
+            if j is not None and bases.get(str(j)) == base_rate:
+                chunk = previous[offsets[j]:offsets[j + 1]]
+                unchanged = unchanged and previous_hashes[16 * i:16 * i + 16] == key
+                if base_rate is not None or clean_currency(index.get(row, 'Rate_low', 0)) > 0:
+                    fx.to_gbp_rate((index.get(row, 'Currency', 'GBP') or '').strip().upper())
+            else:
+                record = schema.make_row(row)
+                enrich_row(record, proxies, fx)
+                writer.writerow(to_values(record))
+                chunk = take_buffer()
+                count_refined += 1
+                unchanged = False
+
+            # A row is filled from a proxy exactly when it has a proxy source.
+            if base_rate is not None:
+                new_bases[str(i)] = base_rate
+                count_proxies += 1
+            hashes.append(key)
+            chunks.append(chunk)
+            new_offsets.append(new_offsets[-1] + len(chunk))
+        stage['rows'] = len(rows)
+
+    report.info.update(rows_refined=count_refined, rows_reused=len(rows) - count_refined)
+    print(f"Refined {count_refined} new or changed rows, reused {len(rows) - count_refined} previous rows.")
+
+    # 4. WRITE OUTPUT & STATE
+    # When every row is reused in place, the output is already correct.
+    try:
+        with report.stage('write') as stage:
+            if unchanged:
+                print(f"No output rows changed; {output_file} left as is.")
+            else:
+                tmp = output_file + '.tmp'
+                with open(tmp, mode='wb') as f:
+                    f.writelines(chunks)
+                os.replace(tmp, output_file)
+            state = {'fingerprint': fingerprint, 'input_hash': input_hash,
+                     'output': output_signature(output_file), 'rows': len(rows), 'proxies': count_proxies,
+                     'fx_unknown': sorted(fx.unknown), 'hashes': ''.join(hashes),
+                     'offsets': new_offsets, 'bases': new_bases}
+            with open(state_file, mode='w', encoding='utf-8') as f:
+                f.write(json.dumps(state, ensure_ascii=False))
+            stage['rows'] = 0 if unchanged else len(rows)
+        print_success(output_file, len(rows), count_proxies, report)
+        return True
+    except Exception as e:
+        print(f"Error writing file: {e}")
+
+def read_shared_lookup(input_files, report):
+    """Pass 1 of a shared-lookup batch: reads every file once.
+
+    Returns ({input_file: (headers, rows)}, shared role|region lookup). Files
+    are added in order, so a later card's rate wins, as later rows do within
+    one file. Unreadable files are reported and left out.
+    """
+    cards = {}
+    shared_lookup = {}
+    with report.stage('read_lookup') as stage:
+        row_count = 0
+        for input_file in input_files:
+            rate_file = open_card(input_file)
+            if rate_file is None:
+                continue
+            headers = rate_file.headers
+            index = rate_file.index
+            rows = []
+            try:
+                with rate_file:
+                    for row in rate_file.rows():
+                        add_to_lookup(shared_lookup, row, index)
+                        rows.append(row)
+            except Exception as e:
+                print(f"Error reading file: {e}")
+                continue
+            cards[input_file] = (headers, rows)
+            row_count += len(rows)
+            print(f"Loaded {len(rows)} data rows from {input_file}.")
+        stage['rows'] = row_count
+    return cards, shared_lookup
+
+_worker_lookup = None
+
+def init_batch_worker(shared_lookup, *settings):
+    """Process-pool initializer: ships the shared lookup and the parent's settings() once per worker."""
+    global _worker_lookup
+    _worker_lookup = shared_lookup
+    configure(*settings)
+
+def refine_card(headers, rows, output_file, shared_lookup=None, fx=FX_TABLE):
+    """Refines one card's rows against its own lookup, then the shared one.
+
+    The card's own rates come first, so its output only differs from a
+    single-file run where it had a "Missing Base" gap. Returns (rows, proxies,
+    currencies `fx` had no rate for); in a pool worker `fx` is a copy.
+    """
+    if shared_lookup is None:
+        shared_lookup = _worker_lookup
+    schema = RowSchema(headers)
+    local_lookup = {}
+    for row in rows:
+        add_to_lookup(local_lookup, row, schema.index)
+    proxies = PROXY_RESOLVER.bind(ChainMap(local_lookup, shared_lookup))
+
+    final_headers = get_output_headers(headers)
+    to_values = schema.writer_for(final_headers)
+    count_proxies = 0
+    with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(final_headers)
+        for row in rows:
+            record = schema.make_row(row)
+            count_proxies += enrich_row(record, proxies, fx)
+            writer.writerow(to_values(record))
+    return len(rows), count_proxies, fx.unknown
+
+def refine_batch(input_files, output_files, workers=1, columnar=False, trace_memory=False, profile=False, fx=None):
+    """Refines many cards against one role|region lookup built from all of them.
+
+    A proxy region (e.g. US-SEA) can then fall back to a base region (US-NYC)
+    that only appears in another supplier's or market's card. Every file is
+    parsed once; with `workers > 1` the cards are refined in parallel, one
+    card per task. `output_files` pairs up with `input_files`. One run report
+    covering the whole batch is written next to the first output.
+    Returns {input_file: output_file or None if it failed}.
+    """
+    print(f"--- Starting Batch Refinement (v10 - shared lookup, {len(input_files)} files) ---")
+    fx = fx or FX_TABLE
+    fx.unknown.clear()
+    report = RunReport(trace_memory=trace_memory, profile=profile)
+    report.info.update(mode='shared-lookup', workers=workers, fx=fx.name, files={})
+    report.start()
+
+    cards, shared_lookup = read_shared_lookup(input_files, report)
+    print(f"Shared lookup holds {len(shared_lookup)} role|region rates from {len(cards)} files.")
+    targets = dict(zip(input_files, output_files))
+    results = dict.fromkeys(input_files)
+
+    with report.stage('refine_write') as stage:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker,
+                                     initargs=(shared_lookup, *settings())) as pool:
+                futures = {name: pool.submit(refine_card, headers, rows, targets[name], None, fx)
+                           for name, (headers, rows) in cards.items()}
+                del cards
+                counts = {}
+                for name, future in futures.items():
+                    try:
+                        count_rows, count_proxies, unknown = future.result()
+                    except Exception as e:
+                        print(f"Error refining {name}: {e}")
+                        continue
+                    counts[name] = count_rows, count_proxies
+                    fx.unknown.update(unknown)
+        else:
+            counts = {}
+            for name in list(cards):
+                headers, rows = cards.pop(name)
+                try:
+                    counts[name] = refine_card(headers, rows, targets[name], shared_lookup, fx)[:2]
+                except Exception as e:
+                    print(f"Error refining {name}: {e}")
+        stage['rows'] = sum(count_rows for count_rows, _ in counts.values())
+
+    for name, (count_rows, count_proxies) in counts.items():
+        results[name] = targets[name]
+        report.info['files'][name] = {'output_file': targets[name], 'rows': count_rows, 'proxies_filled': count_proxies}
+        print(f"Generated: {targets[name]} ({count_rows} rows, {count_proxies} proxy fills)")
+
+    total_rows = sum(count_rows for count_rows, _ in counts.values())
+    total_proxies = sum(count_proxies for _, count_proxies in counts.values())
+    if columnar and counts:
+        from ratecard.columnar import write_columnar
+        with report.stage('columnar') as stage:
+            for name in counts:
+                print(f"Columnar cache: {write_columnar(targets[name])}")
+            stage['rows'] = total_rows
+
+    report.info.update(rows=total_rows, proxies_filled=total_proxies)
+    report_unknown_currencies(fx, report)
+    report.finish()
+
+    print(f"--- SUCCESS ---" if counts else "--- NOTHING REFINED ---")
+    print(f"Total Rows: {total_rows}")
+    print(f"Filled {total_proxies} gaps using proxies.")
+    if counts:
+        print(f"Timings: {report.summary()}")
+        report_dir = os.path.dirname(output_files[0])
+        print(f"Run report: {report.write(os.path.join(report_dir, BATCH_REPORT_NAME))}")
+    return results
+
+def refine(inputs=None, output_file=None, output_dir=None, shared_lookup=False, **options):
+    """Refines every file matched by `inputs` (paths or globs) with refine_data().
+
+    With no inputs the default INPUT_FILE -> OUTPUT_FILE run is done. A single
+    input may be given an explicit `output_file`; otherwise each output is
+    named by ingest.output_path(). `options` are passed on to refine_data().
+
+    With `shared_lookup=True` the files are refined together by
+    refine_batch(), so proxy regions can use base rates from any of them
+    (only `workers`, `columnar`, `trace_memory` and `profile` apply).
+    Returns {input_file: output_file or None if it failed}.
+    """
+    if inputs is None:
+        inputs = [INPUT_FILE]
+        output_file = output_file or OUTPUT_FILE
+    jobs = plan_outputs(inputs, ENRICHED_SUFFIX, output_file, output_dir)
+
+    if shared_lookup:
+        unsupported = [name for name in ('streaming', 'incremental') if options.get(name)]
+        if options.get('engine', 'python') != 'python':
+            unsupported.append('engine')
+        if unsupported:
+            raise ValueError(f"shared_lookup does not support: {', '.join(unsupported)}")
+        if not jobs:
+            return {}
+        for name in ('streaming', 'incremental', 'engine'):
+            options.pop(name, None)
+        files, targets = zip(*jobs)
+        return refine_batch(list(files), list(targets), **options)
+
+    return run_each(jobs, lambda input_file, target: refine_data(input_file, target, **options))
+
+def band_scenarios(inputs, fx_tables):
+    """Re-bands a refined rate card under several FX tables in one pass.
+
+    `inputs` is a ratecard.scenarios.SweepInputs over refined output (proxy
+    gaps already filled); each table is one evaluate() pass with the card's
+    own multiplier, hours per day and bands. Returns {table.name: object
+    array of bands}; for the table the card was refined with, this equals
+    its Band column.
+    """
+    from ratecard.scenarios import Scenario, evaluate
+
+    return {fx.name: evaluate(inputs, Scenario(PRICE_TO_COST_MULTIPLIER, HOURS_PER_DAY, fx, BAND_INDEX))[1]
+            for fx in fx_tables}
+
+def reband(refined_file, fx_tables, output_file=None):
+    """Writes the bands of a refined card under each FX table, side by side.
+
+    Uses the card's columnar cache, (re)building it when it is missing or
+    older than the CSV, so the refinement itself is not rerun. The output
+    (default '<name>_BANDS.csv') has the card's BANDS_COLUMNS (Role, Region,
+    Currency, Rate_low and its own Band, skipping any it lacks), then one
+    'Band <table name>' column per FX table.
+    Returns the output path.
+    """
+    from ratecard.scenarios import SweepInputs, report_unknown_fx
+
+    inputs = SweepInputs.from_card(refined_file)
+    columns = inputs.columns
+    scenarios = band_scenarios(inputs, fx_tables)
+    for fx in fx_tables:
+        report_unknown_fx(inputs, fx)
+    output_file = output_file or os.path.splitext(refined_file)[0] + BANDS_SUFFIX
+    names = [name for name in BANDS_COLUMNS if name in columns]
+    cells = [columns[name].tolist() if name in columns.float_columns else columns.decode(name) for name in names]
+
+    with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(names + [f"Band {name}" for name in scenarios])
+        writer.writerows(zip(*cells, *scenarios.values()))
+    return output_file
@@ -0,0 +1,379 @@
+"""Export a refined rate card to the Firestore `cost_rates` collection.
+
+Writes the same documents AdminDataUpload.jsx does: one per row under
+artifacts/{appId}/public/data/cost_rates, ID '<Role>_<Region>' with
+non-alphanumerics replaced by '_', Rate_low/Rate_high/Estimated_Cost as
+numbers (0 if not numeric) and an uploadedAt timestamp. The browser
+commits one batch at a time, so when several rows share a document ID the
+last one wins. Here the rows are first collapsed to that last row per
+document, then batched and committed concurrently, bounded by
+`concurrency`. No document appears in two batches, so the order in which
+batches land cannot change the result. Each batch is retried with
+exponential backoff on transient errors.
+
+Progress is checkpointed in a sidecar file (`csv` + CHECKPOINT_SUFFIX)
+listing the committed batch numbers. An interrupted export resumes where it
+stopped. The checkpoint is discarded if the CSV, the collection or the
+batch size changed. Batch writes are idempotent `set`s, so a batch that
+was committed but not yet checkpointed is simply written again.
+
+With delta=True only the change since the last successful export of the
+card is written. That export's content hashes are kept in
+`csv` + SNAPSHOT_SUFFIX. Rows are matched on Role|Region|Unit|Source and
+reported as inserts, updates and deletes. Firestore only holds one document
+per Role_Region, the last row written for it, so the writes themselves are
+per document: a set for each document whose content changed and a delete for
+each document no row maps to any more. Without a snapshot every row counts
+as an insert. Full and delta exports write the same one-row-per-document
+map, so the snapshot holds each document's content as written, and a delta
+export leaves the collection as a full export of the new card would.
+Documents written by other means, such as the browser upload, are not
+deleted.
+
+Needs google-cloud-firestore (`pip install google-cloud-firestore`). With
+FIRESTORE_EMULATOR_HOST set, the client talks to the local emulator.
+"""
+import asyncio
+import csv
+import datetime
+import hashlib
+import json
+import os
+import random
+import re
+
+DEFAULT_APP_ID = 'default-app-id'
+BATCH_SIZE = 450  # Firestore allows 500 writes per batch; same margin as the browser upload.
+CHECKPOINT_SUFFIX = '.export.json'
+CHECKPOINT_VERSION = 2  # batches hold one write per document
+SNAPSHOT_SUFFIX = '.exported.json'
+SNAPSHOT_VERSION = 2  # written by exports that send one row per document
+ROW_KEY_COLUMNS = ('Role', 'Region', 'Unit', 'Source')
+NUMERIC_FIELDS = ('Rate_low', 'Rate_high', 'Estimated_Cost')
+
+_UNSAFE_ID_CHARS = re.compile(r'[^a-zA-Z0-9]')
+
+def collection_path(app_id=DEFAULT_APP_ID):
+    return f"artifacts/{app_id}/public/data/cost_rates"
+
+def document_id(role, region):
+    """'<Role>_<Region>' with every non-alphanumeric character replaced, as in the browser upload."""
+    return f"{_UNSAFE_ID_CHARS.sub('_', role)}_{_UNSAFE_ID_CHARS.sub('_', region)}"
+
+def js_number(text):
+    """JavaScript's `Number(text) || 0` for the numeric columns."""
+    try:
+        value = float(text)
+    except (TypeError, ValueError):
+        return 0
+    return value if value == value else 0  # NaN -> 0
+
+def iso_timestamp():
+    """Date.toISOString() format: UTC with milliseconds and a 'Z'."""
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return now.strftime('%Y-%m-%dT%H:%M:%S.') + f"{now.microsecond // 1000:03d}Z"
+
+def read_documents(csv_path, uploaded_at=None):
+    """Yields (document id, data) per row of a refined CSV, in card order.
+
+    Rows without a Role or Region are skipped, like the browser upload does.
+    """
+    uploaded_at = uploaded_at or iso_timestamp()
+    with open(csv_path, mode='r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        reader = csv.reader(f)
+        headers = [h.strip() for h in next(reader, [])]
+        for row in reader:
+            data = dict(zip(headers, (value.strip() for value in row)))
+            if not data.get('Role') or not data.get('Region'):
+                continue
+            for name in NUMERIC_FIELDS:
+                if name in data:
+                    data[name] = js_number(data[name])
+            data['uploadedAt'] = uploaded_at
+            yield document_id(data['Role'], data['Region']), data
+
+def latest_documents(documents):
+    """{document id: data of the last row mapping to it}, in order of each id's first row."""
+    latest = {}
+    for doc_id, data in documents:
+        latest[doc_id] = data
+    return latest
+
+def iter_batches(operations, batch_size=BATCH_SIZE):
+    """Yields (batch number, [(document id, data or None to delete), ...])."""
+    batch = []
+    batch_number = 0
+    for operation in operations:
+        batch.append(operation)
+        if len(batch) == batch_size:
+            yield batch_number, batch
+            batch = []
+            batch_number += 1
+    if batch:
+        yield batch_number, batch
+
+def row_key(data):
+    return '|'.join(str(data.get(name, '')) for name in ROW_KEY_COLUMNS)
+
+def content_hash(data):
+    """Hash of a document's fields, uploadedAt excluded."""
+    content = {name: value for name, value in data.items() if name != 'uploadedAt'}
+    return hashlib.blake2b(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8'),
+                           digest_size=16).hexdigest()
+
+class Snapshot:
+    """Row and document content hashes of a card as exported to one collection."""
+
+    def __init__(self, collection, rows=None, documents=None):
+        self.collection = collection
+        self.rows = rows or {}             # Role|Region|Unit|Source -> hash
+        self.documents = documents or {}   # document id -> hash of the last row written to it
+
+    @classmethod
+    def load(cls, csv_path, collection):
+        """The snapshot of the last successful export of `csv_path` to `collection`, else an empty one."""
+        try:
+            with open(csv_path + SNAPSHOT_SUFFIX, mode='r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return cls(collection)
+        if state.get('collection') != collection or state.get('version') != SNAPSHOT_VERSION:
+            return cls(collection)
+        return cls(collection, state.get('rows'), state.get('documents'))
+
+    def add(self, doc_id, data):
+        digest = content_hash(data)
+        self.rows[row_key(data)] = digest
+        self.documents[doc_id] = digest
+
+    def track(self, documents):
+        """Passes (document id, data) pairs through, adding each to the snapshot."""
+        for doc_id, data in documents:
+            self.add(doc_id, data)
+            yield doc_id, data
+
+    def save(self, csv_path):
+        path = csv_path + SNAPSHOT_SUFFIX
+        tmp = path + '.tmp'
+        with open(tmp, mode='w', encoding='utf-8') as f:
+            json.dump({'version': SNAPSHOT_VERSION, 'collection': self.collection, 'rows': self.rows, 'documents': self.documents}, f)
+        os.replace(tmp, path)
+
+class Delta:
+    """What changed between two snapshots, by row and by document."""
+
+    def __init__(self, previous, current):
+        self.inserts = [key for key in current.rows if key not in previous.rows]
+        self.updates = [key for key, digest in current.rows.items()
+                        if key in previous.rows and previous.rows[key] != digest]
+        self.deletes = [key for key in previous.rows if key not in current.rows]
+        self.writes = [doc_id for doc_id, digest in current.documents.items()
+                       if previous.documents.get(doc_id) != digest]
+        self.removals = [doc_id for doc_id in previous.documents if doc_id not in current.documents]
+
+    def operations(self, documents):
+        """Set operations for changed documents, then deletes; `documents` maps id -> data."""
+        for doc_id in self.writes:
+            yield doc_id, documents[doc_id]
+        for doc_id in self.removals:
+            yield doc_id, None
+
+    def __len__(self):
+        return len(self.writes) + len(self.removals)
+
+class Checkpoint:
+    """Committed batch numbers for one (CSV, collection, batch size) export."""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done = set()
+
+    @classmethod
+    def load(cls, csv_path, collection, batch_size, delta=False):
+        stat = os.stat(csv_path)
+        fingerprint = {'version': CHECKPOINT_VERSION, 'csv_size': stat.st_size, 'csv_mtime': stat.st_mtime,
+                       'collection': collection, 'batch_size': batch_size, 'delta': delta}
+        checkpoint = cls(csv_path + CHECKPOINT_SUFFIX, fingerprint)
+        try:
+            with open(checkpoint.path, mode='r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return checkpoint
+        if state.get('fingerprint') == fingerprint:
+            checkpoint.done = set(state.get('done', []))
+        return checkpoint
+
+    def mark(self, batch_number):
+        self.done.add(batch_number)
+        self.save()
+
+    def save(self):
+        tmp = self.path + '.tmp'
+        with open(tmp, mode='w', encoding='utf-8') as f:
+            json.dump({'fingerprint': self.fingerprint, 'done': sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def transient_errors():
+    """Exception types worth retrying (gRPC/HTTP transient failures)."""
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return (ConnectionError, asyncio.TimeoutError)
+    return (exceptions.Aborted, exceptions.DeadlineExceeded, exceptions.InternalServerError,
+            exceptions.ResourceExhausted, exceptions.ServiceUnavailable, exceptions.TooManyRequests,
+            ConnectionError, asyncio.TimeoutError)
+
+def firestore_committer(collection, project=None):
+    """An async commit(docs) function writing to `collection` with a Firestore AsyncClient."""
+    try:
+        from google.cloud import firestore
+    except ImportError:
+        raise ImportError("Exporting to Firestore needs google-cloud-firestore "
+                          "(pip install google-cloud-firestore)") from None
+
+    client = firestore.AsyncClient(project=project)
+    collection_ref = client.collection(collection)
+
+    async def commit(docs):
+        batch = client.batch()
+        for doc_id, data in docs:
+            if data is None:
+                batch.delete(collection_ref.document(doc_id))
+            else:
+                batch.set(collection_ref.document(doc_id), data)
+        await batch.commit()
+
+    return commit
+
+async def commit_with_retry(commit, docs, retries, base_delay, retry_on):
+    """Commits one batch, retrying `retry_on` errors with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return await commit(docs)
+        except retry_on:
+            if attempt == retries:
+                raise
+            await asyncio.sleep(base_delay * (2 ** attempt) * (0.5 + random.random()))
+
+async def export_rates_async(csv_path, operations, commit, collection, batch_size=BATCH_SIZE, concurrency=8,
+                             retries=5, base_delay=0.5, retry_on=None, restart=False, delta=False,
+                             resumable=True):
+    """Streams `operations` for `csv_path` into batches and commits up to `concurrency` at once.
+
+    `operations` yields (document id, data), data None for a delete, in the
+    same order on every run of the same export (the checkpoint counts
+    batches). `commit` is an async function taking a list of them. Returns
+    (documents written, batches written, batches skipped from the checkpoint).
+    Raises the first error that survives its retries; batches committed
+    before it stay checkpointed (unless `resumable` is False).
+    """
+    checkpoint = Checkpoint.load(csv_path, collection, batch_size, delta)
+    if restart or not resumable:
+        checkpoint.done.clear()
+    retry_on = retry_on or transient_errors()
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    written_docs = written_batches = skipped = 0
+    failure = None
+
+    async def run(batch_number, docs):
+        nonlocal written_docs, written_batches, failure
+        try:
+            await commit_with_retry(commit, docs, retries, base_delay, retry_on)
+            if resumable:
+                checkpoint.mark(batch_number)
+            written_docs += len(docs)
+            written_batches += 1
+            if written_batches % 100 == 0:
+                print(f"Committed {written_docs} documents in {written_batches} batches...")
+        except Exception as e:
+            failure = failure or e
+        finally:
+            slots.release()
+
+    for batch_number, docs in iter_batches(operations, batch_size):
+        if batch_number in checkpoint.done:
+            skipped += 1
+            continue
+        if failure:
+            break
+        await slots.acquire()
+        task = asyncio.ensure_future(run(batch_number, docs))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.gather(*pending)
+    if failure:
+        raise failure
+    return written_docs, written_batches, skipped
+
+def export_rates(csv_path, app_id=DEFAULT_APP_ID, project=None, batch_size=BATCH_SIZE, concurrency=8,
+                 retries=5, restart=False, delta=False, dry_run=False, commit=None):
+    """Exports a refined CSV to Firestore, in full or (delta=True) only what changed. Returns True on success.
+
+    A dry run plans and batches the writes without sending them or touching
+    the checkpoint and snapshot. `commit` replaces the Firestore writer.
+    """
+    if not os.path.exists(csv_path):
+        print(f"Error: Could not find {csv_path}")
+        return
+
+    collection = collection_path(app_id)
+    emulator = os.environ.get('FIRESTORE_EMULATOR_HOST')
+    if dry_run:
+        target = 'dry run'
+    elif commit is not None:
+        target = 'custom writer'
+    else:
+        target = f"emulator at {emulator}" if emulator else 'Firestore'
+    mode = 'delta' if delta else 'full'
+    print(f"--- Exporting {csv_path} to {collection} ({mode}, {target}, {concurrency} concurrent batches) ---")
+
+    # Both modes write the same per-document map, so the snapshot saved after
+    # either one records exactly what each document holds.
+    current = Snapshot(collection)
+    documents = latest_documents(current.track(read_documents(csv_path)))
+    if delta:
+        changes = Delta(Snapshot.load(csv_path, collection), current)
+        print(f"Rows: {len(changes.inserts)} inserted, {len(changes.updates)} updated, "
+              f"{len(changes.deletes)} deleted -> {len(changes.writes)} documents to write, "
+              f"{len(changes.removals)} to delete.")
+        operations = changes.operations(documents)
+        if not changes:
+            if not dry_run:
+                current.save(csv_path)
+            print("--- SUCCESS ---")
+            print("Nothing to export.")
+            return True
+    else:
+        operations = iter(documents.items())
+
+    if dry_run:
+        async def commit(docs):
+            pass
+    commit = commit or firestore_committer(collection, project)
+    try:
+        docs, batches, skipped = asyncio.run(export_rates_async(
+            csv_path, operations, commit, collection, batch_size, concurrency, retries,
+            restart=restart, delta=delta, resumable=not dry_run))
+    except Exception as e:
+        print(f"Error exporting: {e}")
+        print(f"Committed batches are checkpointed in {csv_path + CHECKPOINT_SUFFIX}; rerun to resume.")
+        return
+
+    if skipped:
+        print(f"Resumed: skipped {skipped} batches committed by an earlier run.")
+    print(f"--- SUCCESS ---")
+    print(f"{'Would write' if dry_run else 'Wrote'} {docs} documents in {batches} batches.")
+    if not dry_run:
+        current.save(csv_path)
+        Checkpoint.load(csv_path, collection, batch_size, delta).clear()
+    return True
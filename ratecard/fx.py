@@ -0,0 +1,155 @@
+"""Exchange-rate tables for banding.
+
+Rates are stored as GBP multipliers (1 unit of the currency = `rate` GBP),
+as in the old EXCHANGE_RATES dict. FxTable adds a currency x currency
+conversion matrix and column-at-a-time conversion; FxHistory holds dated
+tables loaded from a local CSV and answers "which rates applied on this
+date":
+
+    Date,Currency,To_GBP
+    2024-01-01,USD,0.79
+    2024-01-01,EUR,0.86
+    2024-07-01,USD,0.77
+
+A currency missing from a table converts at the fallback multiplier (the
+table's 'DEFAULT' entry, else 1.0, as before). Such currencies are recorded
+in `FxTable.unknown` instead of passing silently. NumPy is only imported by
+the batch methods.
+"""
+import csv
+import datetime
+from bisect import bisect_right
+
+DEFAULT_KEY = 'DEFAULT'
+BASE_CURRENCY = 'GBP'
+
+def parse_date(value):
+    """A datetime.date from a date, datetime or ISO 'YYYY-MM-DD' string."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value).strip())
+
+class FxTable:
+    """Currency -> GBP multipliers with cached conversion matrices."""
+
+    def __init__(self, rates, as_of=None, name=None):
+        """`rates` maps currency codes to GBP multipliers; 'DEFAULT' is the fallback."""
+        self.rates = {c: float(r) for c, r in rates.items() if c != DEFAULT_KEY}
+        self.rates.setdefault(BASE_CURRENCY, 1.0)
+        self.fallback = float(rates.get(DEFAULT_KEY, 1.0))
+        self.as_of = as_of
+        self.name = name or (as_of.isoformat() if as_of else 'static')
+        self.currencies = sorted(self.rates)
+        self.codes = {currency: i for i, currency in enumerate(self.currencies)}
+        self.unknown = set()
+        self._matrix = None
+
+    def __contains__(self, currency):
+        return currency in self.rates
+
+    def to_gbp_rate(self, currency):
+        """GBP multiplier for `currency`, or the fallback (recorded in `unknown`)."""
+        rate = self.rates.get(currency)
+        if rate is None:
+            self.unknown.add(currency)
+            return self.fallback
+        return rate
+
+    def convert(self, amount, from_currency, to_currency=BASE_CURRENCY):
+        """Converts one amount between two currencies (via GBP)."""
+        if to_currency == BASE_CURRENCY:
+            return amount * self.to_gbp_rate(from_currency)
+        return amount * self.to_gbp_rate(from_currency) / self.to_gbp_rate(to_currency)
+
+    def as_dict(self):
+        """The table in EXCHANGE_RATES form, 'DEFAULT' included."""
+        return dict(self.rates, **{DEFAULT_KEY: self.fallback})
+
+    def matrix(self):
+        """`m[i, j]` converts an amount in currencies[i] into currencies[j]."""
+        if self._matrix is None:
+            import numpy as np
+            to_gbp = np.array([self.rates[c] for c in self.currencies], dtype=np.float64)
+            self._matrix = to_gbp[:, None] / to_gbp[None, :]
+        return self._matrix
+
+    def multipliers(self, currencies, to_currency=BASE_CURRENCY):
+        """Conversion factor into `to_currency` for each label in `currencies`, read from matrix().
+
+        Meant for the distinct labels of a column (e.g. its categories), so the
+        per-row work is a single fancy-index with the column's codes. Labels
+        missing from the table convert at the fallback and are recorded in
+        `unknown`.
+        """
+        import numpy as np
+        matrix = self.matrix()
+        target = self.codes.get(to_currency)
+        if target is None:
+            target_rate = self.to_gbp_rate(to_currency)
+            base = self.codes[BASE_CURRENCY]
+            column = matrix[:, base] * (self.rates[BASE_CURRENCY] / target_rate)
+        else:
+            target_rate = self.rates[to_currency]
+            column = matrix[:, target]
+
+        known = np.array([c in self.codes for c in currencies], dtype=bool)
+        factors = column[np.array([self.codes.get(c, 0) for c in currencies], dtype=np.intp)]
+        if not known.all():
+            self.unknown.update(c for c in currencies if c not in self.codes)
+            factors[~known] = self.fallback / target_rate
+        return factors
+
+    def convert_many(self, amounts, currency_codes, labels, to_currency=BASE_CURRENCY):
+        """Converts a column of amounts whose currencies are codes into `labels`."""
+        import numpy as np
+        return np.asarray(amounts, dtype=np.float64) * self.multipliers(labels, to_currency)[currency_codes]
+
+class FxHistory:
+    """Dated FxTables; as_of() returns the latest table on or before a date."""
+
+    def __init__(self, tables):
+        """`tables` maps dates (or ISO strings) to {currency: GBP multiplier}.
+
+        A dated table only needs the currencies that changed: rates carry
+        forward from earlier dates until overridden.
+        """
+        if not tables:
+            raise ValueError("FxHistory needs at least one dated table")
+        self.dates = []
+        self.tables = []
+        in_force = {}
+        for date, rates in sorted((parse_date(d), rates) for d, rates in tables.items()):
+            in_force = dict(in_force, **rates)
+            self.dates.append(date)
+            self.tables.append(FxTable(in_force, as_of=date))
+
+    def __len__(self):
+        return len(self.tables)
+
+    @classmethod
+    def load(cls, path):
+        """Reads a Date,Currency,To_GBP CSV (any column order, extra columns ignored)."""
+        tables = {}
+        with open(path, mode='r', newline='', encoding='utf-8-sig') as f:
+            for line_number, row in enumerate(csv.DictReader(f), start=2):
+                try:
+                    date = parse_date(row['Date'])
+                    currency = row['Currency'].strip().upper()
+                    rate = float(row['To_GBP'])
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"{path}, line {line_number}: bad FX row {row!r} ({e})") from None
+                tables.setdefault(date, {})[currency] = rate
+        return cls(tables)
+
+    def as_of(self, date):
+        """The table in force on `date`."""
+        date = parse_date(date)
+        i = bisect_right(self.dates, date)
+        if i == 0:
+            raise ValueError(f"No FX rates on or before {date} (first table is {self.dates[0]})")
+        return self.tables[i - 1]
+
+    def latest(self):
+        return self.tables[-1]
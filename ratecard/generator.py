@@ -0,0 +1,355 @@
+"""Value-based rate generation (generate_rates v3).
+
+Every role in a truth file is matched to the raw rate-card "cost profile"
+whose UK price is closest to the role's GBP rate, and that profile's
+per-country rates are written out for every region in REGIONS. generate()
+runs this for many truth files against one raw file, loading the archetypes
+only once. With match='title' roles are instead matched to raw rows by
+title (ratecard.rolematch), so distinct roles at one price keep their own
+rates; price matching remains the fallback and the tiebreaker.
+
+Rows stream from the truth file to the output in chunks of CHUNK_ROLES
+roles, so memory does not grow with roles x regions. With workers > 1 the
+chunks are fanned out to a process pool (the archetypes are shipped once per
+worker) and written back in truth-file order.
+
+The parsed raw roles (title, seniority, UK rate and per-region rates as
+floats) are cached next to the raw file in '<raw>.archetypes.json', keyed by a hash of the raw
+file's content and the REGIONS columns. Repeated runs against an unchanged
+supplier card load that instead of parsing the raw file.
+"""
+import csv
+import io
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from ratecard.archetypes import ArchetypeIndex
+from ratecard.ingest import content_hash, plan_outputs, run_each
+from ratecard.money import clean_currency
+from ratecard.rolematch import RoleIndex, parse_level
+
+# --- CONFIGURATION ---
+TRUTH_FILE = 'Roles x Rates reconcilliation - _ADJUSTED FOR TRUTH.csv'
+RAW_FILE = 'Roles x Rates reconcilliation - _RAW_CONTENT LAB.csv'
+OUTPUT_FILE = 'GLOBAL_COST_RATES_FINAL.csv'
+
+# Batch runs name each output after its truth file.
+GENERATED_SUFFIX = '_GENERATED.csv'
+
+# Regions (Target Code -> Raw Column Name, Currency)
+REGIONS = [
+    ('UK-LON', 'United Kingdom', 'GBP'),
+    ('EU-ES', 'Spain', 'EUR'),
+    ('EU-FR', 'France', 'EUR'),
+    ('EU-DE', 'Germany', 'EUR'),
+    ('EU-IT', 'Italy', 'EUR'),
+    ('LATAM-BR', 'Brazil', 'BRL'),
+    ('APAC-CN', 'China_L', 'CNY'),
+    ('NA-CA', 'Canada', 'CAD'),
+    ('EU-CH', 'Switzerland HQ', 'CHF'),
+    ('APAC-IN', 'India-USD', 'USD'),
+    ('APAC-CN-USD', 'China-USD', 'USD'),
+    ('LATAM-MX', 'Mexico-USD', 'USD'),
+    ('EU-PL', 'Poland-USD', 'USD')
+]
+
+# Parsed-archetype cache written next to the raw file.
+ARCHETYPE_CACHE_SUFFIX = '.archetypes.json'
+ARCHETYPE_CACHE_VERSION = 2
+
+# Truth-file roles matched and written per chunk.
+CHUNK_ROLES = 2000
+
+OUTPUT_HEADERS = ['Category | Function', 'Role', 'Resource type', 'Unit', 'Region', 'Rate_low', 'Rate_high', 'Currency', 'Source', 'Notes']
+
+def load_archetypes(raw_file, use_cache=True):
+    """Builds the GBP price -> profile ArchetypeIndex, or returns None on error."""
+    roles = load_raw_roles(raw_file, use_cache)
+    return archetypes_from_roles(roles) if roles is not None else None
+
+def archetypes_from_roles(roles):
+    """The first profile per UK price, as an ArchetypeIndex.
+
+    This groups every role with the same UK rate into one "cost profile".
+    """
+    rate_profile_map = {}
+    for _, _, _, gbp_val, profile in roles:
+        if gbp_val > 0 and gbp_val not in rate_profile_map:
+            rate_profile_map[gbp_val] = profile
+    archetypes = ArchetypeIndex(rate_profile_map)
+    print(f"Found {len(archetypes)} unique GBP price points to use as archetypes.")
+    return archetypes
+
+def load_raw_roles(raw_file, use_cache=True):
+    """The raw file's roles as [category, title, seniority level, UK rate, profile], or None on error.
+
+    A profile maps each REGIONS raw column to its rate as a float. With
+    `use_cache` the roles come from the raw file's archetype cache when its
+    content hash matches, and the cache is (re)written otherwise.
+    """
+    cache_file = raw_file + ARCHETYPE_CACHE_SUFFIX
+    key = None
+    if use_cache:
+        key = {'version': ARCHETYPE_CACHE_VERSION, 'content_hash': content_hash(raw_file),
+               'columns': [raw_col for _, raw_col, _ in REGIONS]}
+        roles = read_archetype_cache(cache_file, key)
+        if roles is not None:
+            print(f"Loaded {len(roles)} raw roles from {cache_file}.")
+            return roles
+
+    roles = parse_raw_roles(raw_file)
+    if roles is not None and use_cache:
+        write_archetype_cache(cache_file, key, roles)
+    return roles
+
+def read_archetype_cache(cache_file, key):
+    """The cached raw roles, or None if missing or keyed differently."""
+    try:
+        with open(cache_file, mode='r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('key') != key:
+        return None
+    return cache['roles']
+
+def write_archetype_cache(cache_file, key, roles):
+    tmp = cache_file + '.tmp'
+    try:
+        with open(tmp, mode='w', encoding='utf-8') as f:
+            json.dump({'key': key, 'roles': roles}, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not write archetype cache {cache_file}: {e}")
+
+def parse_raw_roles(raw_file):
+    """Parses the raw file into [category, title, seniority level, UK rate, profile] rows, or None on error."""
+    roles = []
+    region_columns = [raw_col for _, raw_col, _ in REGIONS]
+
+    print(f"Reading raw file: {raw_file}...")
+    with open(raw_file, mode='r', encoding='utf-8-sig', errors='replace') as f:
+        # Headers are on row 4 (index 3), under some junk rows.
+        # We'll read until we find the header row starting with "Department / Category"
+        reader = csv.reader(f)
+        header_found = False
+        headers = []
+
+        for row in reader:
+            if row and "Department / Category" in row[0]:
+                headers = row
+                header_found = True
+                break
+
+        if not header_found:
+            print("Error: Could not find header row in Raw file.")
+            return None
+
+        title_col = next((h for h in headers if h.startswith('Job Title')), None)
+        level_col = next((h for h in headers if h.startswith('Seniority Level')), None)
+
+        # Now iterate through data rows
+        dict_reader = csv.DictReader(f, fieldnames=headers)
+
+        for row in dict_reader:
+            # column 'United Kingdom' contains the GBP rate
+            gbp_val = clean_currency(row.get('United Kingdom'))
+            profile = {raw_col: clean_currency(row[raw_col]) for raw_col in region_columns if raw_col in row}
+            roles.append([
+                (row.get(headers[0]) or '').strip(),
+                (row.get(title_col) or '').strip() if title_col else '',
+                parse_level(row.get(level_col)) if level_col else None,
+                gbp_val,
+                profile,
+            ])
+
+    return roles
+
+class TitleMatcher:
+    """Matches truth roles to raw roles by title (ratecard.rolematch); price only breaks ties."""
+
+    def __init__(self, roles, min_score=0.5):
+        self.roles = [role for role in roles if role[1]]
+        self.index = RoleIndex([role[1] for role in self.roles], [role[0] for role in self.roles],
+                               [role[2] for role in self.roles], [role[3] for role in self.roles])
+        self.min_score = min_score
+
+    def match(self, role_name, category, target_rate):
+        """(profile, notes) of the best title match, or None below `min_score`."""
+        found = self.index.best(role_name, category, price=target_rate, min_score=self.min_score)
+        if found is None:
+            return None
+        i, score = found
+        return self.roles[i][4], f"Title Match: {self.roles[i][1]} (score {score:.2f})"
+
+def read_truth_roles(truth_file):
+    """Returns [(role, category, GBP target rate)] for every truth row with a rate."""
+    return list(iter_truth_roles(truth_file))
+
+def iter_truth_roles(truth_file):
+    """Yields (role, category, GBP target rate) for every truth row with a rate."""
+    print(f"Processing truth file: {truth_file}...")
+
+    with open(truth_file, mode='r', encoding='utf-8-sig', errors='replace') as f:
+        reader = csv.DictReader(f)
+
+        for row in reader:
+            role_name = row.get('Role', 'Unknown Role')
+            category = row.get('Category | Function', 'Unknown Category')
+
+            # Find the rate column (usually 'Rate_low' or 'Rate')
+            target_rate = 0.0
+            for key in ['Rate_low', 'Rate', 'Unit Rate']:
+                if key in row and row[key]:
+                    target_rate = clean_currency(row[key])
+                    break
+
+            if target_rate == 0:
+                print(f"Warning: No GBP rate found for {role_name}")
+                continue
+
+            yield role_name, category, target_rate
+
+def chunked(items, size):
+    """Yields lists of up to `size` consecutive items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate_rows(truth_roles, archetypes, titles=None):
+    """Yields one output row per (truth role, region)."""
+    for chunk in chunked(truth_roles, CHUNK_ROLES):
+        yield from generate_chunk_rows(chunk, archetypes, titles)
+
+def generate_chunk_rows(truth_roles, archetypes, titles=None):
+    """generate_rows() for one list of truth roles.
+
+    With a TitleMatcher, roles are matched by title first and by price only
+    when no title scores high enough.
+    """
+    rate_profile_map = archetypes.profiles
+
+    # Find Matching Profiles (one batch query per chunk)
+    targets = [target_rate for _, _, target_rate in truth_roles] if archetypes else []
+    closest_rates = [float(r) for r in archetypes.nearest_many(targets)] if targets else []
+
+    for (role_name, category, target_rate), closest in zip(truth_roles, closest_rates):
+        title_match = titles.match(role_name, category, target_rate) if titles else None
+        if title_match:
+            match_row, notes = title_match
+        # Exact match check
+        elif target_rate in rate_profile_map:
+            match_row = rate_profile_map[target_rate]
+            notes = "Exact Rate Match"
+        else:
+            match_row = rate_profile_map[closest]
+            notes = f"Approximate Match: Target {target_rate} -> Used {closest}"
+
+        # Create one row per region for this role
+        for region_code, raw_col, currency in REGIONS:
+            # If the raw data is missing a rate for a specific country (e.g. Poland), it stays 0
+            market_rate = match_row.get(raw_col, 0.0)
+
+            yield {
+                'Category | Function': category,
+                'Role': role_name,
+                'Resource type': 'FTE',
+                'Unit': 'Hour',
+                'Region': region_code,
+                'Rate_low': market_rate,
+                'Rate_high': market_rate,
+                'Currency': currency,
+                'Source': 'OP_Content Lab',
+                'Notes': notes
+            }
+
+_worker_archetypes = None
+_worker_titles = None
+
+def init_generate_worker(archetypes, titles=None):
+    """Process-pool initializer: ships the archetypes (and title matcher) once per worker."""
+    global _worker_archetypes, _worker_titles
+    _worker_archetypes = archetypes
+    _worker_titles = titles
+
+def render_chunk(truth_roles):
+    """A chunk's output rows as CSV text, and their count (runs in a pool worker)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=OUTPUT_HEADERS)
+    count = 0
+    for row in generate_chunk_rows(truth_roles, _worker_archetypes, _worker_titles):
+        writer.writerow(row)
+        count += 1
+    return buffer.getvalue(), count
+
+def map_ordered(pool, fn, items, window):
+    """pool.map() that keeps at most `window` items in flight, so a lazy input stays lazy."""
+    pending = []
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.pop(0).result()
+    for future in pending:
+        yield future.result()
+
+def generate_data(truth_file, archetypes, output_file, workers=1, titles=None):
+    """Generates `output_file` from one truth file. Returns True on success."""
+    if not os.path.exists(truth_file):
+        print(f"Error: Could not find {truth_file}")
+        return
+
+    print(f"Writing rows to {output_file}...")
+    count_rows = 0
+    with open(output_file, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=OUTPUT_HEADERS)
+        writer.writeheader()
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_generate_worker,
+                                     initargs=(archetypes, titles)) as pool:
+                chunks = chunked(iter_truth_roles(truth_file), CHUNK_ROLES)
+                for text, count in map_ordered(pool, render_chunk, chunks, 2 * workers):
+                    f.write(text)
+                    count_rows += count
+        else:
+            for row in generate_rows(iter_truth_roles(truth_file), archetypes, titles):
+                writer.writerow(row)
+                count_rows += 1
+
+    print(f"Done! Wrote {count_rows} rows.")
+    return True
+
+def generate(inputs=None, raw_file=RAW_FILE, output_file=None, output_dir=None, workers=1, use_cache=True,
+             match='price'):
+    """Generates rates for every truth file matched by `inputs` (paths or globs).
+
+    With no inputs the default TRUTH_FILE -> OUTPUT_FILE run is done. The raw
+    file's archetypes are loaded once and shared by all truth files; each
+    file is fanned out over `workers` processes. `match` is 'price' (the
+    v3 behaviour) or 'title'.
+    Returns {truth_file: output_file or None if it failed}.
+    """
+    print(f"--- Starting Rate Generation (Value-Based v3) ---")
+
+    if match not in ('price', 'title'):
+        raise ValueError(f"match must be 'price' or 'title', not {match!r}")
+    if inputs is None:
+        inputs = [TRUTH_FILE]
+        output_file = output_file or OUTPUT_FILE
+    jobs = plan_outputs(inputs, GENERATED_SUFFIX, output_file, output_dir)
+
+    if not os.path.exists(raw_file):
+        print(f"Error: Could not find {raw_file}")
+        return {truth_file: None for truth_file, _ in jobs}
+    roles = load_raw_roles(raw_file, use_cache)
+    if roles is None:
+        return {truth_file: None for truth_file, _ in jobs}
+    archetypes = archetypes_from_roles(roles)
+    titles = TitleMatcher(roles) if match == 'title' else None
+
+    return run_each(jobs, lambda truth_file, target: generate_data(truth_file, archetypes, target, workers, titles))
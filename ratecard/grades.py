@@ -0,0 +1,224 @@
+"""EG grade-band spreadsheets as a typed grade x location cost table.
+
+"EG bands b - _grade resource.csv" stacks one block per location:
+
+    ,, US_AUS ,,12,52,260
+    ,,, Annual cost to business , Monthly , Weekly , Day
+    ,, I ," $ 104,210.00 "," $ 8,684.17 "," $ 2,004.04 ", $ 400.81
+
+"EG bands a - Creative hiring data - TCB.csv" puts its blocks side by side:
+
+    ,,LA,Year,(day),(hr),LON,Year,(day),(hr),RAW Blended Rate,(day),(hr)
+    ,, J ," $ 142,020.00 ", $ 546.23 , $ 68.28 , J ," $ 125,788.00 ", ...
+
+Both are read the same way. A grid starts at an annual-cost header followed
+by at least one more period column. Its location is the cell left of that
+header, or the label just above it. Grades are read down the location
+column until a blank. Bracketed notes ('[No I SF]') are skipped, and so are
+tables that are not grade x period grids (averages, grade diffs, notes).
+Money cells go through clean_currency. Periods a sheet leaves out are
+derived from the annual cost (12 months, 52 weeks, 260 days, 8-hour days).
+
+GradeIndex compiles the grids into a (grade, location) -> costs lookup and
+derives what the refiners used to hard-code: band thresholds (midpoints
+between consecutive grades' hourly costs) and location multipliers for
+proxies. load_grade_index() caches each parsed file next to it, keyed by
+the file's content hash.
+"""
+import csv
+import json
+import os
+import re
+from statistics import mean
+
+from ratecard.ingest import content_hash
+from ratecard.money import clean_currency
+
+GRADE_FILES = ['EG bands b - _grade resource.csv', 'EG bands a - Creative hiring data - TCB.csv']
+
+GRADE_CACHE_SUFFIX = '.grades.json'
+GRADE_CACHE_VERSION = 1
+
+PERIODS = ('annual', 'monthly', 'weekly', 'day', 'hour')
+PERIOD_LABELS = {
+    'annual cost to business': 'annual',
+    'year': 'annual',
+    'monthly': 'monthly',
+    'weekly': 'weekly',
+    'day': 'day',
+    '(day)': 'day',
+    'hour': 'hour',
+    '(hr)': 'hour',
+}
+PERIODS_PER_YEAR = {'monthly': 12, 'weekly': 52, 'day': 260}
+HOURS_PER_DAY = 8
+
+# Sheet labels -> canonical location. The TCB sheet's 'LA' grid holds the same
+# figures as the grade resource sheet's US_SANF block.
+LOCATION_ALIASES = {'UK': 'UK_LON', 'LON': 'UK_LON', 'LA': 'US_SANF'}
+
+# Ceiling of the top derived band, as in BAND_RANGES.
+TOP_BAND_CEILING = 9999
+
+_GRADE_RE = re.compile(r'^(?:[A-Z]|VP|SVP)$')
+_MAX_LEAD_IN_ROWS = 3
+
+def canonical_location(label):
+    label = label.strip().upper().replace(' ', '_')
+    return LOCATION_ALIASES.get(label, label)
+
+def region_code(location):
+    """Rate-card region for an EG location: 'US_SEA' -> 'US-SEA'."""
+    return location.replace('_', '-')
+
+def parse_grade_grids(path):
+    """Returns [(grade, location, {period: cost})] for every grade grid in a sheet."""
+    with open(path, mode='r', newline='', encoding='utf-8-sig', errors='replace') as f:
+        rows = [[cell.strip() for cell in row] for row in csv.reader(f)]
+
+    def cell(r, c):
+        return rows[r][c] if r < len(rows) and c < len(rows[r]) else ''
+
+    entries = []
+    for r, row in enumerate(rows):
+        for c in range(1, len(row)):
+            if PERIOD_LABELS.get(row[c].lower()) != 'annual':
+                continue
+            columns = []
+            for j in range(c, len(row)):
+                period = PERIOD_LABELS.get(row[j].lower())
+                if period is None or period in (p for _, p in columns):
+                    break
+                columns.append((j, period))
+            if len(columns) < 2:
+                continue
+
+            grade_column = c - 1
+            label = cell(r, grade_column) or cell(r - 1, grade_column)
+            if not label or _GRADE_RE.match(label):
+                continue
+            location = canonical_location(label)
+
+            started = False
+            for rr in range(r + 1, len(rows)):
+                grade = cell(rr, grade_column)
+                if not grade:
+                    if started or rr - r > _MAX_LEAD_IN_ROWS:
+                        break
+                    continue
+                if grade.startswith('['):  # e.g. '[No I SF]'
+                    continue
+                costs = {period: clean_currency(cell(rr, j)) for j, period in columns}
+                if not _GRADE_RE.match(grade) or costs['annual'] <= 0:
+                    break
+                started = True
+                entries.append((grade, location, {p: v for p, v in costs.items() if v > 0}))
+    return entries
+
+def complete_costs(costs):
+    """Fills the periods a sheet left out from the annual (or day) cost."""
+    costs = dict(costs)
+    annual = costs.get('annual')
+    if annual:
+        for period, per_year in PERIODS_PER_YEAR.items():
+            costs.setdefault(period, annual / per_year)
+    if costs.get('day'):
+        costs.setdefault('hour', costs['day'] / HOURS_PER_DAY)
+    return costs
+
+class GradeIndex:
+    """Compiled (grade, location) -> {period: cost} lookup over parsed EG grids."""
+
+    def __init__(self, entries):
+        """`entries` are (grade, location, {period: cost}); earlier entries win per period."""
+        self.costs = {}
+        for grade, location, costs in entries:
+            merged = self.costs.setdefault((grade, location), {})
+            for period, value in costs.items():
+                merged.setdefault(period, value)
+        self.costs = {key: complete_costs(costs) for key, costs in self.costs.items()}
+
+        self.locations = list(dict.fromkeys(location for _, location in self.costs))
+        annuals = {}
+        for (grade, _), costs in self.costs.items():
+            annuals.setdefault(grade, []).append(costs['annual'])
+        self.grades = sorted(annuals, key=lambda grade: mean(annuals[grade]))
+
+    def __len__(self):
+        return len(self.costs)
+
+    def cost(self, grade, location, period='hour'):
+        """Cost of `grade` at `location` per `period`, or None if the sheets don't have it."""
+        costs = self.costs.get((grade, canonical_location(location)))
+        return costs.get(period) if costs else None
+
+    def grid(self, period='hour'):
+        """[[grade, cost per location...]] in grade order, None where a grade is missing."""
+        return [[grade] + [self.cost(grade, location, period) for location in self.locations]
+                for grade in self.grades]
+
+    def band_ranges(self, location='UK_LON', grades=None, period='hour', multiplier=1.0):
+        """BAND_RANGES-style (low, high, grade) triples from one location's costs.
+
+        Each boundary is the midpoint between two consecutive grades' costs
+        (times `multiplier`, e.g. an FX rate to GBP). The lowest band starts
+        at 0 and the top one runs to TOP_BAND_CEILING.
+        """
+        location = canonical_location(location)
+        grades = grades or self.grades
+        points = [(self.cost(grade, location, period), grade) for grade in grades]
+        points = sorted((value * multiplier, grade) for value, grade in points if value is not None)
+        if not points:
+            raise ValueError(f"No {period} costs for {location}")
+        bounds = [0] + [round((a + b) / 2, 2) for (a, _), (b, _) in zip(points, points[1:])] + [TOP_BAND_CEILING]
+        return [(bounds[i], bounds[i + 1], grade) for i, (_, grade) in enumerate(points)]
+
+    def location_multiplier(self, location, base, period='annual'):
+        """Mean cost ratio of `location` to `base` over the grades both have."""
+        location, base = canonical_location(location), canonical_location(base)
+        ratios = [self.cost(grade, location, period) / self.cost(grade, base, period)
+                  for grade in self.grades
+                  if self.cost(grade, location, period) and self.cost(grade, base, period)]
+        if not ratios:
+            raise ValueError(f"No grades shared by {location} and {base}")
+        return mean(ratios)
+
+    def proxies(self, base, locations=None, period='annual'):
+        """LOCATION_PROXIES-style {region: {'base': region, 'mult': x}} relative to `base`."""
+        base = canonical_location(base)
+        locations = [canonical_location(l) for l in locations] if locations else self.locations
+        return {region_code(location): {'base': region_code(base),
+                                        'mult': round(self.location_multiplier(location, base, period), 2)}
+                for location in locations if location != base}
+
+def load_grade_entries(path, use_cache=True):
+    """parse_grade_grids(path), via its '<path>.grades.json' cache when the content hash matches."""
+    if not use_cache:
+        return parse_grade_grids(path)
+
+    cache_file = path + GRADE_CACHE_SUFFIX
+    key = {'version': GRADE_CACHE_VERSION, 'content_hash': content_hash(path)}
+    try:
+        with open(cache_file, mode='r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('key') == key:
+            return [tuple(entry) for entry in cache['entries']]
+    except (OSError, ValueError):
+        pass
+
+    entries = parse_grade_grids(path)
+    tmp = cache_file + '.tmp'
+    try:
+        with open(tmp, mode='w', encoding='utf-8') as f:
+            json.dump({'key': key, 'entries': entries}, f)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not write grade cache {cache_file}: {e}")
+    return entries
+
+def load_grade_index(paths=None, use_cache=True):
+    """A GradeIndex over the given EG sheets (default: GRADE_FILES); earlier files win."""
+    entries = []
+    for path in paths or GRADE_FILES:
+        entries.extend(load_grade_entries(path, use_cache))
+    return GradeIndex(entries)
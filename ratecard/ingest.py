@@ -0,0 +1,202 @@
+"""Memory-mapped CSV ingestion for master rate files.
+
+The master files start with junk rows ("48,445,,,,") before the real header.
+The old readers found the header with csv.reader, rewound the file, skipped
+the same lines again and then built a dict per row. Here the file is
+memory-mapped once, the header is located with a single byte-level scan, and
+data rows are yielded as tuples that are read through a HeaderIndex.
+"""
+import codecs
+import csv
+import glob
+import hashlib
+import io
+import mmap
+import os
+import re
+
+REQUIRED_HEADERS = ('Role', 'Region')
+
+# A '\r' that does not start a CRLF: an old Mac line end.
+LONE_CARRIAGE_RETURN = re.compile(rb'\r(?!\n)')
+
+class HeaderIndex:
+    """Maps header names to tuple positions (later duplicates win, like DictReader)."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.positions
+
+    def __getitem__(self, name):
+        return self.positions[name]
+
+    def get(self, row, name, default=''):
+        """Value of column `name` in `row`.
+
+        Mirrors DictReader + dict.get(): `default` if the column does not
+        exist, None if the row is too short to have it.
+        """
+        i = self.positions.get(name)
+        if i is None:
+            return default
+        return row[i] if i < len(row) else None
+
+class RateFile:
+    """A memory-mapped rate file with its header located.
+
+    `headers` is [] if no line names every REQUIRED_HEADERS column.
+    `header_line` is the 0-based line number of the header row and
+    `data_offset` the byte offset of the first data row.
+    """
+
+    def __init__(self, path, required=REQUIRED_HEADERS):
+        self.path = path
+        self.headers = []
+        self.header_line = 0
+        self.data_offset = 0
+        self._file = open(path, mode='rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            self._mm = None
+        else:
+            self._find_header(required)
+
+    def _find_header(self, required):
+        mm = self._mm
+        pos = 3 if mm[:3] == codecs.BOM_UTF8 else 0
+        needles = [name.encode('utf-8') for name in required]
+        line_no = 0
+        size = len(mm)
+        while pos < size:
+            end = mm.find(b'\n', pos)
+            end = size if end == -1 else end + 1
+            # Cheap byte test first; only candidate lines are parsed as CSV.
+            if all(needle in mm[pos:end] for needle in needles):
+                line = mm[pos:end].decode('utf-8', errors='replace')
+                row = next(csv.reader([line]), [])
+                if all(name in row for name in required):
+                    self.headers = row
+                    self.header_line = line_no
+                    self.data_offset = end
+                    return
+            pos = end
+            line_no += 1
+
+    @property
+    def index(self):
+        return HeaderIndex(self.headers)
+
+    def rows(self):
+        """Yields every non-blank data row after the header as a tuple of str.
+
+        Rows come straight off the memory map. In a CRLF file, a row the CSV
+        reader took from more than one line has a quoted cell with a line
+        break in it; its '\r\n' become '\n' there, as the old text-mode
+        readers saw them. Files with bare '\r' line ends are read with
+        universal newlines.
+        """
+        if not self.headers:
+            return
+        carriage_returns = self.has_carriage_returns()
+        if carriage_returns and LONE_CARRIAGE_RETURN.search(self._mm, self.data_offset):
+            yield from self._text_rows()
+            return
+        self._mm.seek(self.data_offset)
+        # Splitting on b'\n' never cuts a UTF-8 sequence, so each line decodes on its own.
+        lines = (line.decode('utf-8', errors='replace') for line in iter(self._mm.readline, b''))
+        reader = csv.reader(lines)
+        if not carriage_returns:
+            for row in reader:
+                if row:
+                    yield tuple(row)
+            return
+        line_num = 0
+        for row in reader:
+            if reader.line_num - line_num > 1:
+                row = [cell.replace('\r\n', '\n') for cell in row]
+            line_num = reader.line_num
+            if row:
+                yield tuple(row)
+
+    def _text_rows(self):
+        with open(self.path, mode='rb') as raw:
+            raw.seek(self.data_offset)
+            with io.TextIOWrapper(raw, encoding='utf-8', errors='replace') as lines:
+                for row in csv.reader(lines):
+                    if row:
+                        yield tuple(row)
+
+    def has_carriage_returns(self):
+        """True if any data row contains a '\r' (CRLF line ends or cells)."""
+        return bool(self.headers) and self._mm.find(b'\r', self.data_offset) != -1
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_rate_file(path, required=REQUIRED_HEADERS):
+    return RateFile(path, required)
+
+def expand_inputs(patterns, skip_suffix=None):
+    """Expands paths and globs into a de-duplicated list of input files.
+
+    Glob matches are sorted; files ending in `skip_suffix` (earlier outputs)
+    are dropped so rerunning over '*.csv' does not pick up its own results.
+    A plain path is kept even if missing, so the caller can report it.
+    """
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        files.extend(m for m in matches if not (skip_suffix and m.endswith(skip_suffix)))
+    return list(dict.fromkeys(files))
+
+def output_path(input_file, suffix, output_dir=None):
+    """'<dir>/<name><suffix>' for `input_file`, in `output_dir` if given."""
+    stem = os.path.splitext(os.path.basename(input_file))[0]
+    return os.path.join(output_dir or os.path.dirname(input_file), stem + suffix)
+
+def plan_outputs(inputs, suffix, output_file=None, output_dir=None):
+    """Pairs every file matched by `inputs` (paths or globs) with its output.
+
+    Outputs are named by output_path() with `suffix`, which also keeps
+    earlier outputs out of the inputs. A single input may be given an
+    explicit `output_file` instead; otherwise ValueError. `output_dir` is
+    created if needed. Returns [(input_file, output_file)].
+    """
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    files = expand_inputs(inputs, suffix)
+    if output_file and len(files) != 1:
+        raise ValueError(f"output_file needs exactly one input, got {len(files)}")
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    return [(input_file, output_file or output_path(input_file, suffix, output_dir)) for input_file in files]
+
+def run_each(jobs, process):
+    """Calls process(input_file, output_file) per job from plan_outputs(), in order.
+
+    Returns {input_file: output_file, or None if `process` returned a false value}.
+    """
+    return {input_file: output_file if process(input_file, output_file) else None for input_file, output_file in jobs}
+
+def content_hash(path):
+    """blake2b digest of a file's bytes, for keying caches derived from it."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, mode='rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,53 @@
+"""Money parsing for rate-card cells.
+
+Every script used to carry its own `clean_currency`, each a chain of
+`str.replace` calls plus `float()`. This is the one shared version: a fast
+path for cells that are already plain numbers, a regex for everything else,
+and a memo cache because rate cards repeat the same few values ("75.00",
+"375.00") thousands of times.
+"""
+import functools
+import re
+
+# Multi-character symbols come first so 'R$' is not left behind as 'R'.
+CURRENCY_SYMBOLS = ['CAN$', 'US$', 'R$', 'CHF', '£', '$', '€']
+
+# Regex (also used by the vectorized backend) matching everything that is
+# stripped before parsing: symbols, thousands separators, whitespace, quotes.
+STRIP_PATTERN = '|'.join(re.escape(s) for s in CURRENCY_SYMBOLS) + r'|[,\s"\']'
+
+_STRIP_RE = re.compile(STRIP_PATTERN)
+
+@functools.lru_cache(maxsize=65536)
+def parse_money(text):
+    """Parses a money string such as ' $ 104,210.00 ' or 'R$375'. Returns 0.0 if unparseable."""
+    # Fast path: most cells are already plain numbers.
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return float(_STRIP_RE.sub('', text))
+    except ValueError:
+        return 0.0
+
+def clean_currency(val):
+    """Converts a rate-card cell (str, number or None) to a float, 0.0 if empty or invalid."""
+    if not val:
+        return 0.0
+    if type(val) is str:
+        return parse_money(val)
+    if isinstance(val, (int, float)):
+        return float(val)
+    return parse_money(str(val))
+
+def round2(values):
+    """Vectorized round(x, 2) over a NumPy array that matches Python's correctly-rounded result."""
+    import numpy as np
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+    # np.rint can disagree with round() only when x*100 sits on a .5 boundary.
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(float(v), 2) for v in values[near_half]]
+    return rounded
@@ -0,0 +1,120 @@
+"""Stage timing and run reports for the refine pipeline.
+
+A RunReport collects one entry per pipeline stage (seconds, rows, rows/sec,
+peak RSS so far in KB and, with `trace_memory`, the tracemalloc peak inside
+the stage). Peak RSS is None on platforms without the `resource` module
+(Windows). With `profile` the whole run is captured with cProfile as well. The
+report is written as JSON next to the output file so runs can be charted over
+time.
+"""
+import cProfile
+import datetime
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; peak RSS is reported as None there.
+    resource = None
+
+REPORT_SUFFIX = '.report.json'
+PROFILE_SUFFIX = '.prof'
+
+def maxrss_kb(ru_maxrss):
+    """An rusage ru_maxrss value in KB: macOS reports bytes, Linux and the BSDs KB."""
+    return ru_maxrss // 1024 if sys.platform == 'darwin' else ru_maxrss
+
+def peak_rss_kb():
+    """This process's peak RSS so far in KB, or None without the resource module."""
+    if resource is None:
+        return None
+    return maxrss_kb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+class RunReport:
+    """Per-stage timings and counters for one refine run."""
+
+    def __init__(self, trace_memory=False, profile=False):
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.info = {}
+        self.stages = []
+        self._profiler = None
+        self._started = None
+        self._finished = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.trace_memory:
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def finish(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._finished = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block. Set `stage['rows']` inside to get throughput."""
+        entry = {'name': name, 'rows': None}
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield entry
+        finally:
+            seconds = time.perf_counter() - start
+            entry['seconds'] = round(seconds, 6)
+            if entry['rows'] is not None and seconds > 0:
+                entry['rows_per_sec'] = round(entry['rows'] / seconds, 1)
+            entry['peak_rss_kb'] = peak_rss_kb()
+            if self.trace_memory and tracemalloc.is_tracing():
+                entry['traced_peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            self.stages.append(entry)
+
+    def summary(self):
+        """One-line human summary, e.g. 'read 0.12s, enrich 0.30s, write 0.08s'."""
+        return ', '.join(f"{s['name']} {s['seconds']:.2f}s" for s in self.stages)
+
+    def top_functions(self, limit=25):
+        """cProfile's top functions by cumulative time, as text."""
+        if self._profiler is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def as_dict(self):
+        total = None
+        if self._started is not None and self._finished is not None:
+            total = round(self._finished - self._started, 6)
+        return dict(
+            self.info,
+            timestamp=datetime.datetime.now().isoformat(timespec='seconds'),
+            total_seconds=total,
+            peak_rss_kb=peak_rss_kb(),
+            stages=self.stages,
+        )
+
+    def write(self, output_file):
+        """Writes `output_file` + REPORT_SUFFIX (and the .prof dump when profiling)."""
+        report = self.as_dict()
+        if self._profiler is not None:
+            profile_file = output_file + PROFILE_SUFFIX
+            self._profiler.dump_stats(profile_file)
+            report['profile_file'] = profile_file
+            report['profile_top'] = self.top_functions()
+
+        report_file = output_file + REPORT_SUFFIX
+        with open(report_file, mode='w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report_file
@@ -0,0 +1,79 @@
+"""Proxy fill for regions without a rate of their own.
+
+A proxy table maps a region to a base region and a multiplier, e.g.
+US-SEA -> US-NYC x 0.95. ProxyResolver follows these as chains: if the base
+region has no rate either but is itself proxied, the next hop is tried and
+the multipliers compound (US-AUS -> US-NYC -> UK-LON). Cycles are rejected
+when the table is built.
+
+ProxyFill binds a resolver to one role|region rate lookup and memoizes the
+resolved rate of every proxy region per role, so a role's closure is worked
+out once however many of its rows have gaps.
+"""
+
+class ProxyResolver:
+    """Region -> [(base, mult), ...] proxy chains, validated to be acyclic."""
+
+    def __init__(self, proxies):
+        """`proxies` maps a region to {'base': region, 'mult': factor}."""
+        self.proxies = proxies
+        self.chains = {region: self._chain(region) for region in proxies}
+        self.base_regions = {base for chain in self.chains.values() for base, _ in chain}
+
+    def _chain(self, region):
+        chain = []
+        seen = [region]
+        while region in self.proxies:
+            proxy = self.proxies[region]
+            region = proxy['base']
+            if region in seen:
+                raise ValueError(f"Proxy cycle: {' -> '.join(seen + [region])}")
+            seen.append(region)
+            chain.append((region, proxy['mult']))
+        return chain
+
+    def __contains__(self, region):
+        return region in self.chains
+
+    def bind(self, rate_lookup):
+        """A memoizing ProxyFill over `rate_lookup` ('role|region' -> rate)."""
+        return ProxyFill(self, rate_lookup)
+
+class ProxyFill:
+    """A ProxyResolver's answers for one rate lookup, memoized per role."""
+
+    def __init__(self, resolver, rate_lookup):
+        self.resolver = resolver
+        self.rate_lookup = rate_lookup
+        self._closures = {}
+
+    def closure(self, role):
+        """{region: (rate, note)} for every proxy region `role` can fill.
+
+        The rate is unrounded: the nearest base with a rate times the
+        multipliers back along the chain. The note reads
+        'Proxy: US-NYC x 0.85' for one hop and
+        'Proxy: US-NYC x 0.85 -> UK-LON x 0.9' for longer chains.
+        """
+        closure = self._closures.get(role)
+        if closure is None:
+            closure = {}
+            for region, chain in self.resolver.chains.items():
+                for depth, (base, _) in enumerate(chain):
+                    rate = self.rate_lookup.get(f"{role}|{base}")
+                    if rate is not None:
+                        for _, mult in reversed(chain[:depth + 1]):
+                            rate = rate * mult
+                        hops = ' -> '.join(f"{base} x {mult}" for base, mult in chain[:depth + 1])
+                        closure[region] = (rate, f"Proxy: {hops}")
+                        break
+            self._closures[role] = closure
+        return closure
+
+    def resolve(self, role, region):
+        """(rate, note) for a proxy region of `role`, or None if no base has a rate."""
+        return self.closure(role).get(region)
+
+    def missing_note(self, region):
+        """The note for a proxy region none of whose bases has a rate."""
+        return f"Missing Base: {self.resolver.chains[region][0][0]}"
@@ -0,0 +1,159 @@
+"""Indexed lookups over a refined rate card.
+
+Planners ask "rate for Role X in Region Y, in currency Z" and "every role in
+band M under £120/h". RateIndex loads a refined CSV once, then answers both
+kinds of question without scanning it:
+
+    primary      (Role, Region) -> row ids
+    secondary    Role, Region, Band, Currency, Category | Function -> row ids
+    range        rows sorted by hourly GBP rate, overall and per band
+
+The hourly GBP rate is the one the card was banded with (FX to GBP, day
+rates divided by the hours in a day). Point lookups are one dict probe and
+range queries are a bisect plus the rows they return.
+
+    index = RateIndex.from_csv('GLOBAL_COST_RATES_ENRICHED_FINAL.csv')
+    index.get('Senior Designer', 'UK-LON', currency='USD')
+    index.query(band='M', max_hourly_gbp=120)
+"""
+import csv
+from bisect import bisect_left, bisect_right
+
+from ratecard.engine import FX_TABLE, HOURS_PER_DAY
+from ratecard.money import clean_currency
+
+# Secondary (equality) indexes: query() keyword -> column.
+SECONDARY_COLUMNS = {
+    'role': 'Role',
+    'region': 'Region',
+    'band': 'Band',
+    'currency': 'Currency',
+    'category': 'Category | Function',
+}
+
+class RateIndex:
+    """Hash, secondary and range indexes over the rows of a refined rate card."""
+
+    def __init__(self, headers, rows, fx=FX_TABLE, hours_per_day=HOURS_PER_DAY):
+        self.headers = list(headers)
+        self.rows = [tuple(row) for row in rows]
+        self.fx = fx
+        positions = {name: i for i, name in enumerate(self.headers)}
+
+        def column(name):
+            i = positions.get(name)
+            return [row[i].strip() if i is not None and i < len(row) else '' for row in self.rows]
+
+        # Normalized per-row values of every indexed column, for filtering.
+        self.values = {name: column(column_name) for name, column_name in SECONDARY_COLUMNS.items()}
+        self.values['currency'] = [c.upper() for c in self.values['currency']]
+        self.rate_low = [clean_currency(v) for v in column('Rate_low')]
+
+        self.hourly_gbp = []
+        for rate, currency, unit in zip(self.rate_low, self.values['currency'], column('Unit')):
+            hourly = rate * fx.to_gbp_rate(currency) if rate > 0 else 0.0
+            if 'day' in unit.lower():
+                hourly = hourly / hours_per_day
+            self.hourly_gbp.append(hourly)
+
+        self.by_key = {}
+        for row_id, key in enumerate(zip(self.values['role'], self.values['region'])):
+            self.by_key.setdefault(key, []).append(row_id)
+
+        self.secondary = {}
+        for name, values in self.values.items():
+            postings = {}
+            for row_id, value in enumerate(values):
+                postings.setdefault(value, []).append(row_id)
+            self.secondary[name] = postings
+
+        # Range indexes: (hourly GBP, row id) pairs sorted by rate, for priced rows.
+        def sorted_by_rate(row_ids):
+            pairs = sorted((self.hourly_gbp[i], i) for i in row_ids if self.rate_low[i] > 0)
+            return [rate for rate, _ in pairs], [i for _, i in pairs]
+
+        self.by_rate = sorted_by_rate(range(len(self.rows)))
+        self.band_by_rate = {band: sorted_by_rate(ids) for band, ids in self.secondary['band'].items()}
+
+    @classmethod
+    def from_csv(cls, path, **kwargs):
+        """Loads a refined CSV (as written by ratecard.engine.refine_data)."""
+        with open(path, mode='r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.reader(f)
+            headers = next(reader, [])
+            rows = [row for row in reader if row]
+        return cls(headers, rows, **kwargs)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def target_currency(self, currency):
+        """`currency` upper-cased, or None if not given. ValueError if the FX table has no rate for it."""
+        if not currency:
+            return None
+        currency = currency.strip().upper()
+        if currency not in self.fx:
+            raise ValueError(f"No FX rate for {currency!r}")
+        return currency
+
+    def record(self, row_id, currency=None):
+        """Row `row_id` as a dict, with Hourly_GBP and optionally the rate in `currency`."""
+        record = dict(zip(self.headers, self.rows[row_id]))
+        record['Hourly_GBP'] = round(self.hourly_gbp[row_id], 2)
+        currency = self.target_currency(currency)
+        if currency:
+            converted = self.fx.convert(self.rate_low[row_id], self.values['currency'][row_id], currency)
+            record['Rate_converted'] = round(converted, 2)
+            record['Converted_currency'] = currency
+        return record
+
+    def get(self, role, region, currency=None):
+        """The row for (role, region), or None. Later rows win, as in the refiner's lookup."""
+        currency = self.target_currency(currency)
+        row_ids = self.by_key.get((role.strip(), region.strip()))
+        return self.record(row_ids[-1], currency) if row_ids else None
+
+    def get_all(self, role, region, currency=None):
+        """Every row for (role, region), in card order."""
+        currency = self.target_currency(currency)
+        return [self.record(i, currency) for i in self.by_key.get((role.strip(), region.strip()), [])]
+
+    def query(self, role=None, region=None, band=None, currency=None, category=None,
+              min_hourly_gbp=None, max_hourly_gbp=None, convert_to=None, limit=None):
+        """Rows matching every given filter, as dicts.
+
+        Role + region goes through the primary index. Otherwise the most
+        selective secondary index drives the scan and the other filters
+        are checked per row. Hourly GBP bounds are inclusive and use the
+        range index, per band when `band` is given. With a rate bound the
+        rows come back cheapest first, otherwise in card order. An unknown
+        `convert_to` currency or a `limit` below 1 raises ValueError.
+        """
+        convert_to = self.target_currency(convert_to)
+        if limit is not None and limit < 1:
+            raise ValueError(f"limit must be at least 1, got {limit}")
+        filters = {'role': role, 'region': region, 'band': band,
+                   'currency': currency.upper() if currency else None, 'category': category}
+        filters = {name: value.strip() for name, value in filters.items() if value is not None}
+
+        if min_hourly_gbp is not None or max_hourly_gbp is not None:
+            rates, row_ids = self.band_by_rate.get(filters.pop('band'), ([], [])) if band is not None else self.by_rate
+            lo = 0 if min_hourly_gbp is None else bisect_left(rates, min_hourly_gbp)
+            hi = len(rates) if max_hourly_gbp is None else bisect_right(rates, max_hourly_gbp)
+            scan = map(row_ids.__getitem__, range(lo, hi))
+        elif 'role' in filters and 'region' in filters:
+            scan = self.by_key.get((filters.pop('role'), filters.pop('region')), [])
+        elif filters:
+            driver = min(filters, key=lambda name: len(self.secondary[name].get(filters[name], ())))
+            scan = self.secondary[driver].get(filters.pop(driver), [])
+        else:
+            scan = range(len(self.rows))
+
+        checks = [(self.values[name], value) for name, value in filters.items()]
+        results = []
+        for row_id in scan:
+            if all(values[row_id] == value for values, value in checks):
+                results.append(self.record(row_id, convert_to))
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
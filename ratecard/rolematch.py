@@ -0,0 +1,197 @@
+"""Fuzzy role-title matching between truth files and supplier rate cards.
+
+Titles rarely agree exactly ('Investor Relations & Regulatory Sr. Manager'
+vs 'Senior Manager, Regulatory'). RoleIndex normalizes every supplier title
+into tokens, expanding abbreviations such as 'Sr' and 'Assoc.', and into
+character trigrams. It keeps an inverted index for both. A query is scored
+only against its block: the titles that share a token with it, or, for
+typos and run-together words, the titles sharing the most trigrams. Blocks
+are grown from the rarest tokens and never exceed `block_size` titles, so
+a query never scans the whole catalog. A query made only of common words
+('Senior Manager') takes the titles having all of them, and among those
+the shortest, the ones it would score highest against.
+
+The score, between 0 and 1, is an IDF-weighted token overlap (Dice) blended
+with trigram overlap. A title with a domain prefix ('Insights & Analytics -
+Analyst') is also scored without it, and the better of the two counts. A
+matching category closes a little of the gap to 1, and differing
+seniority words ('Junior' vs 'Senior') or seniority levels take a little
+off, as does a rank noun ('Director', 'Manager') the query does not name.
+When several titles score close to the best, the one whose price is
+closest to the query's wins. The window widens as the best score drops,
+so price decides between weak title matches but never overrules a strong
+one.
+
+    index = RoleIndex(titles, categories=categories, prices=uk_rates)
+    index.best('Sr. Art Director', category='Creative', price=120.0)
+"""
+import heapq
+import math
+import re
+from collections import Counter
+
+ABBREVIATIONS = {
+    'sr': 'senior', 'snr': 'senior', 'jr': 'junior', 'jnr': 'junior',
+    'assoc': 'associate', 'asst': 'assistant', 'dir': 'director', 'mgr': 'manager',
+    'exec': 'executive', 'coord': 'coordinator', 'acd': 'associate creative director',
+    'cd': 'creative director', 'ecd': 'executive creative director', 'vp': 'vice president',
+}
+
+# Title words that mark seniority; titles disagreeing on them are penalized.
+SENIORITY_WORDS = {'intern', 'junior', 'assistant', 'associate', 'senior', 'lead', 'principal',
+                   'head', 'chief', 'group', 'executive', 'global', 'regional'}
+
+# Title nouns naming a rank. A title with a rank the query does not name is
+# penalized: 'Associate, Regulatory' is not an 'Assoc. Director, Regulatory'.
+RANK_WORDS = {'director', 'manager', 'president', 'officer', 'partner', 'supervisor', 'coordinator'}
+
+STOP_WORDS = {'and', 'of', 'the', 'for', 'a', 'an', 'to', 'in'}
+
+TOKEN_WEIGHT = 0.75
+CATEGORY_BONUS = 0.05
+SENIORITY_PENALTY = 0.15
+RANK_PENALTY = 0.15
+LEVEL_PENALTY = 0.03
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_LEVEL_RE = re.compile(r'level\s*(\d+)', re.IGNORECASE)
+
+def title_tokens(title):
+    """Normalized, abbreviation-expanded title words, in order."""
+    tokens = []
+    for word in _WORD_RE.findall(title.lower()):
+        tokens.extend(ABBREVIATIONS.get(word, word).split())
+    return [token for token in tokens if token not in STOP_WORDS]
+
+def trigrams(tokens):
+    text = f" {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def parse_level(text):
+    """The number in a seniority column such as 'Level 2 (4-7 years)', or None."""
+    match = _LEVEL_RE.search(text or '')
+    return int(match.group(1)) if match else None
+
+class RoleIndex:
+    """Token and trigram inverted indexes over supplier role titles."""
+
+    def __init__(self, titles, categories=None, levels=None, prices=None, block_size=256):
+        """Parallel lists: titles plus optional categories, seniority levels and prices.
+
+        A query's block is grown from its rarest tokens' postings and stops
+        before it would exceed `block_size` titles. If even the rarest
+        token's postings are longer, the block is narrowed to the titles
+        having every query token, then capped to the `block_size` lightest
+        (lowest total IDF) of them. Common words like 'manager' then only
+        open a block when nothing rarer matches; they still count in the
+        score.
+        """
+        self.titles = list(titles)
+        count = len(self.titles)
+        self.categories = [(c or '').strip().lower() for c in categories] if categories else [''] * count
+        self.levels = list(levels) if levels else [None] * count
+        self.prices = list(prices) if prices else [None] * count
+
+        self.tokens = [set(title_tokens(title)) for title in self.titles]
+        self.grams = [trigrams(sorted(tokens)) for tokens in self.tokens]
+        self.seniority = [tokens & SENIORITY_WORDS for tokens in self.tokens]
+        self.ranks = [tokens & RANK_WORDS for tokens in self.tokens]
+
+        self.token_postings = {}
+        for i, tokens in enumerate(self.tokens):
+            for token in tokens:
+                self.token_postings.setdefault(token, []).append(i)
+        self.gram_postings = {}
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.gram_postings.setdefault(gram, []).append(i)
+
+        self.idf = {token: math.log(1 + count / len(ids)) for token, ids in self.token_postings.items()}
+        self.unseen_idf = math.log(1 + count)
+        self.weights = [sum(self.idf[t] for t in tokens) for tokens in self.tokens]
+        self.block_size = block_size
+
+    def __len__(self):
+        return len(self.titles)
+
+    def block(self, tokens, grams):
+        """Candidate title ids for a query: shared rare tokens, else shared trigrams."""
+        postings = sorted((self.token_postings[t] for t in tokens if t in self.token_postings), key=len)
+        if postings and len(postings[0]) > self.block_size:
+            # Only common words: narrow to the titles having them all (skipping
+            # a word that would empty the block), then keep the lightest.
+            block = set(postings[0])
+            for ids in postings[1:]:
+                if len(block) <= self.block_size:
+                    break
+                block = block.intersection(ids) or block
+            if len(block) > self.block_size:
+                block = heapq.nsmallest(self.block_size, block, key=lambda i: (self.weights[i], i))
+            return set(block)
+        if postings:
+            block = set(postings[0])
+            for ids in postings[1:]:
+                if len(block) + len(ids) > self.block_size:
+                    break
+                block.update(ids)
+            return block
+        shared = Counter(i for gram in grams for i in self.gram_postings.get(gram, ()))
+        needed = max(2, len(grams) // 3)
+        return {i for i, n in shared.most_common(self.block_size) if n >= needed}
+
+    def score(self, i, tokens, grams, seniority, category=None, level=None, ranks=None):
+        """Similarity of title `i` to a normalized query, from 0 to 1."""
+        weight = lambda ts: sum(self.idf.get(t, self.unseen_idf) for t in ts)
+        total = weight(tokens) + self.weights[i]
+        token_score = 2 * weight(tokens & self.tokens[i]) / total if total else 0.0
+        gram_total = len(grams) + len(self.grams[i])
+        gram_score = 2 * len(grams & self.grams[i]) / gram_total if gram_total else 0.0
+        score = TOKEN_WEIGHT * token_score + (1 - TOKEN_WEIGHT) * gram_score
+
+        if category and category == self.categories[i]:
+            score += CATEGORY_BONUS * (1 - score)
+        if seniority != self.seniority[i]:
+            score -= SENIORITY_PENALTY
+        if ranks is not None and not self.ranks[i] <= ranks:
+            score -= RANK_PENALTY
+        if level is not None and self.levels[i] is not None:
+            score -= LEVEL_PENALTY * abs(level - self.levels[i])
+        return max(score, 0.0)
+
+    def search(self, title, category=None, level=None, limit=5):
+        """The best-scoring [(score, title id)] for `title`, highest first."""
+        category = (category or '').strip().lower()
+        best = {}
+        variants = [title]
+        if ' - ' in title:
+            variants.append(title.split(' - ', 1)[1])  # 'Domain - Title' -> 'Title'
+        for variant in variants:
+            tokens = set(title_tokens(variant))
+            grams = trigrams(sorted(tokens))
+            seniority = tokens & SENIORITY_WORDS
+            ranks = tokens & RANK_WORDS
+            for i in self.block(tokens, grams):
+                score = self.score(i, tokens, grams, seniority, category, level, ranks)
+                if score > best.get(i, float('-inf')):
+                    best[i] = score
+        scored = sorted(((score, i) for i, score in best.items()), key=lambda pair: (-pair[0], pair[1]))
+        return scored[:limit]
+
+    def best(self, title, category=None, level=None, price=None, min_score=0.5, tie=0.5):
+        """(title id, score) of the best match scoring at least `min_score`, or None.
+
+        The weaker the top score, the more titles count as tied with it:
+        those within `tie` times the top score's distance from 1. They are
+        separated by closeness of their price to `price`, then by catalog
+        order. An exact title (score 1) is never overruled by price.
+        """
+        scored = self.search(title, category, level, limit=len(self.titles))
+        if not scored or scored[0][0] < min_score:
+            return None
+        top = scored[0][0]
+        floor = top - tie * max(1.0 - top, 0.0)
+        close = [(score, i) for score, i in scored if score >= floor]
+        if price is not None:
+            close.sort(key=lambda pair: (abs((self.prices[pair[1]] or 0.0) - price), -pair[0], pair[1]))
+        score, i = close[0]
+        return i, score
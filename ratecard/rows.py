@@ -0,0 +1,106 @@
+"""Compact in-memory representation of rate-card rows.
+
+A plain dict per row costs several hundred bytes before its values are
+counted, and the refine step used to copy it again to add three columns.
+RateRow is a `__slots__` record over the row's cell tuple, with the
+highly-repetitive text columns (Role, Region, Currency, Unit, Source, ...)
+interned so millions of rows share one string object per distinct value.
+RowSchema turns a record back into CSV values only at write time.
+"""
+from sys import intern
+
+from ratecard.ingest import HeaderIndex
+
+# Categorical columns whose values repeat across rows.
+INTERNED_COLUMNS = ('Role', 'Region', 'Currency', 'Unit', 'Source', 'Category | Function', 'Resource type')
+
+# Columns the refine step may rewrite or add, and the RateRow slot holding
+# each; everything else is written straight from the cell tuple.
+RECORD_COLUMNS = {
+    'Rate_low': 'rate_low',
+    'Rate_high': 'rate_high',
+    'Notes': 'notes',
+    'Estimated_Cost': 'estimated_cost',
+    'Band': 'band',
+    'Anomaly_Flag': 'anomaly_flag',
+}
+
+class RateRow:
+    """One rate-card row.
+
+    `cells` is the input tuple (interned where useful). `role` ... `notes`
+    start as the raw cell text (or the column default when the column is
+    missing); the refine steps overwrite `rate_low`/`rate_high`/`notes` and
+    fill the computed columns in place.
+    """
+    __slots__ = ('cells', 'role', 'region', 'unit', 'currency', 'source',
+                 'rate_low', 'rate_high', 'notes', 'estimated_cost', 'band', 'anomaly_flag')
+
+    def __init__(self, cells, role, region, unit, currency, source, rate_low, rate_high, notes):
+        self.cells = cells
+        self.role = role
+        self.region = region
+        self.unit = unit
+        self.currency = currency
+        self.source = source
+        self.rate_low = rate_low
+        self.rate_high = rate_high
+        self.notes = notes
+        self.estimated_cost = ''
+        self.band = ''
+        self.anomaly_flag = ''
+
+class RowSchema:
+    """Builds RateRows from cell tuples of one file and writes them back out."""
+
+    def __init__(self, headers):
+        self.headers = list(headers)
+        self.index = HeaderIndex(headers)
+        self._interned = [i for i, name in enumerate(self.headers) if name in INTERNED_COLUMNS]
+
+    def make_row(self, cells):
+        """Creates a RateRow from a data tuple. Short rows are padded with ''."""
+        n = len(self.headers)
+        if len(cells) != n:
+            cells = tuple(cells[:n]) + ('',) * (n - len(cells))
+        if self._interned:
+            cells = list(cells)
+            for i in self._interned:
+                cells[i] = intern(cells[i])
+            cells = tuple(cells)
+
+        get = self.index.get
+        return RateRow(
+            cells,
+            role=get(cells, 'Role'),
+            region=get(cells, 'Region'),
+            unit=get(cells, 'Unit', 'Hour'),
+            currency=get(cells, 'Currency', 'GBP'),
+            source=get(cells, 'Source'),
+            rate_low=get(cells, 'Rate_low', 0),
+            rate_high=get(cells, 'Rate_high', 0),
+            notes=get(cells, 'Notes'),
+        )
+
+    def writer_for(self, output_headers):
+        """Returns a function mapping a RateRow to its CSV values for `output_headers`."""
+        getters = []
+        for name in output_headers:
+            if name in RECORD_COLUMNS:
+                getters.append((True, RECORD_COLUMNS[name]))
+            elif name in self.index:
+                getters.append((False, self.index[name]))
+            else:
+                getters.append((None, None))
+
+        def to_values(row):
+            values = []
+            for from_record, key in getters:
+                if from_record:
+                    values.append(getattr(row, key))
+                elif from_record is None:
+                    values.append('')
+                else:
+                    values.append(row.cells[key])
+            return values
+        return to_values
@@ -0,0 +1,200 @@
+"""Scenario sweeps: re-price a refined rate card under many assumptions at once.
+
+Cost, band and anomaly flag depend on the price-to-cost multiplier, the
+hours in a day, the FX table and the band ranges. The proxy fill before
+them does not, so a refined card can be re-evaluated without rerunning
+the refinement. SweepInputs normalizes the card's columnar cache once:
+rates, currency codes and a day-rate mask. Each Scenario is then one
+vectorized pass over those arrays.
+
+    inputs = SweepInputs.from_card('GLOBAL_COST_RATES_ENRICHED_FINAL.csv')
+    grid = scenario_grid([2.1, 2.2, 2.35], [7.5, 8.0], [FX_TABLE], [('EG', DEFAULT_BAND_INDEX)])
+    summary = sweep(inputs, grid)
+"""
+import csv
+import itertools
+import os
+
+import numpy as np
+
+from ratecard.bands import UNKNOWN_BAND
+from ratecard.columnar import load_or_build_columnar
+from ratecard.money import round2
+
+# sweep() summary file written next to the card by the CLI.
+SCENARIOS_SUFFIX = '_SCENARIOS.csv'
+
+class Scenario:
+    """One what-if: price-to-cost multiplier, hours per day, FX table and bands."""
+
+    def __init__(self, multiplier, hours_per_day, fx, band_index, bands_name='default'):
+        self.multiplier = float(multiplier)
+        self.hours_per_day = float(hours_per_day)
+        self.fx = fx
+        self.band_index = band_index
+        self.bands_name = bands_name
+
+    @property
+    def name(self):
+        return f"x{self.multiplier:g} {self.hours_per_day:g}h fx={self.fx.name} bands={self.bands_name}"
+
+    def __repr__(self):
+        return f"Scenario({self.name})"
+
+def scenario_grid(multipliers, hours_per_day, fx_tables, band_indexes):
+    """Every combination of the given values; `band_indexes` holds (name, BandIndex) pairs."""
+    return [Scenario(mult, hours, fx, band_index, bands_name)
+            for mult, hours, fx, (bands_name, band_index)
+            in itertools.product(multipliers, hours_per_day, fx_tables, band_indexes)]
+
+def parse_values(text):
+    """Parses '2.1,2.35' or a 'start:stop:step' range (stop included) into floats."""
+    values = []
+    for part in text.split(','):
+        part = part.strip()
+        if ':' in part:
+            start, stop, step = (float(x) for x in part.split(':'))
+            if step <= 0:
+                raise ValueError(f"Range step must be positive: {part}")
+            count = int(round((stop - start) / step)) + 1
+            values.extend(round(start + i * step, 10) for i in range(count))
+        elif part:
+            values.append(float(part))
+    return values
+
+class SweepInputs:
+    """The scenario-independent columns of a refined card, normalized once."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.rates = np.array(columns['Rate_low'], dtype=np.float64)
+        self.priced = self.rates > 0
+        num_rows = len(self.rates)
+
+        if 'Currency' in columns:
+            self.currency_codes = np.asarray(columns['Currency'])
+            self.currencies = [c.strip().upper() for c in columns.categories['Currency']]
+        else:
+            self.currency_codes = np.zeros(num_rows, dtype=np.int32)
+            self.currencies = ['']
+        # Currencies that get converted: the ones on priced rows.
+        self.priced_currencies = sorted({self.currencies[code] for code in np.unique(self.currency_codes[self.priced])})
+
+        if 'Unit' in columns:
+            day_labels = np.array(['day' in u.strip().lower() for u in columns.categories['Unit']], dtype=bool)
+            self.is_day = day_labels[np.asarray(columns['Unit'])]
+        else:
+            self.is_day = np.zeros(num_rows, dtype=bool)
+
+    @classmethod
+    def from_card(cls, refined_file):
+        """Inputs for a refined CSV, via its (re)built columnar cache."""
+        return cls(load_or_build_columnar(refined_file))
+
+    def __len__(self):
+        return len(self.rates)
+
+def unknown_currencies(inputs, fx):
+    """Currencies of priced rows that `fx` has no rate for (converted at its fallback)."""
+    return [currency for currency in inputs.priced_currencies if currency not in fx]
+
+def report_unknown_fx(inputs, fx):
+    """Records and warns about unknown_currencies(), as refine_data() does. Returns them."""
+    unknown = unknown_currencies(inputs, fx)
+    if unknown:
+        fx.unknown.update(unknown)
+        print(f"Warning: no FX rate in {fx.name} for {', '.join(repr(c) for c in unknown)}; "
+              f"converted at x{fx.fallback}.")
+    return unknown
+
+def evaluate(inputs, scenario):
+    """Returns (estimated_cost, band, anomaly) arrays for one scenario.
+
+    Same rules as ratecard.engine.enrich_row: cost is the local rate over the
+    multiplier rounded to pennies, banding uses the GBP hourly rate, and a
+    row is an anomaly when its cost exceeds its rate.
+    """
+    rates, priced = inputs.rates, inputs.priced
+
+    estimated_cost = np.zeros(len(rates))
+    estimated_cost[priced] = round2(rates[priced] / scenario.multiplier)
+
+    rate_for_banding = rates * scenario.fx.multipliers(inputs.currencies)[inputs.currency_codes]
+    rate_for_banding[inputs.is_day] = rate_for_banding[inputs.is_day] / scenario.hours_per_day
+
+    bands = np.full(len(rates), UNKNOWN_BAND, dtype=object)
+    bands[priced] = scenario.band_index.classify(rate_for_banding[priced])
+
+    anomaly = priced & (estimated_cost > rates)
+    return estimated_cost, bands, anomaly
+
+def scenario_output_path(output_dir, index, scenario):
+    slug = ''.join(c if c.isalnum() or c in '.-' else '_' for c in scenario.name)
+    return os.path.join(output_dir, f"{index:03d}_{slug}.csv")
+
+def write_scenario(path, inputs, estimated_cost, bands, anomaly):
+    """Per-scenario detail: the card's key columns plus this scenario's results."""
+    columns = inputs.columns
+    key_columns = [name for name in ('Role', 'Region', 'Currency') if name in columns]
+    decoded = [columns.decode(name) for name in key_columns]
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(key_columns + ['Rate_low', 'Estimated_Cost', 'Band', 'Anomaly_Flag'])
+        for i in range(len(inputs)):
+            writer.writerow([column[i] for column in decoded] + [
+                float(inputs.rates[i]), float(estimated_cost[i]) if inputs.priced[i] else 0,
+                bands[i], 'Cost > Price' if anomaly[i] else ''])
+
+def sweep(inputs, scenarios, output_dir=None):
+    """Evaluates every scenario; returns one summary dict per scenario.
+
+    A summary has the scenario settings, the total estimated cost in GBP
+    (each row's cost converted with the scenario's FX table), the anomaly
+    count, a row count per band and the currencies the table had no rate
+    for. With `output_dir`, each scenario's per-row results are written
+    there too.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    unknown = {}
+    for scenario in scenarios:
+        if scenario.fx.name not in unknown:
+            unknown[scenario.fx.name] = report_unknown_fx(inputs, scenario.fx)
+
+    summary = []
+    for index, scenario in enumerate(scenarios):
+        estimated_cost, bands, anomaly = evaluate(inputs, scenario)
+        to_gbp = scenario.fx.multipliers(inputs.currencies)[inputs.currency_codes]
+        labels, counts = np.unique(bands.astype(str), return_counts=True)
+        entry = {
+            'scenario': scenario.name,
+            'multiplier': scenario.multiplier,
+            'hours_per_day': scenario.hours_per_day,
+            'fx': scenario.fx.name,
+            'bands': scenario.bands_name,
+            'rows': len(inputs),
+            'total_estimated_cost_gbp': round(float((estimated_cost * to_gbp).sum()), 2),
+            'anomalies': int(anomaly.sum()),
+            'band_counts': dict(zip(labels.tolist(), counts.tolist())),
+            'fx_unknown_currencies': unknown[scenario.fx.name],
+        }
+        if output_dir:
+            entry['output_file'] = scenario_output_path(output_dir, index, scenario)
+            write_scenario(entry['output_file'], inputs, estimated_cost, bands, anomaly)
+        summary.append(entry)
+    return summary
+
+def write_summary(summary, path):
+    """Writes the scenario x band summary as CSV, one row per scenario."""
+    band_labels = sorted({band for entry in summary for band in entry['band_counts']},
+                         key=lambda band: (band == UNKNOWN_BAND, band))
+    fields = ['scenario', 'multiplier', 'hours_per_day', 'fx', 'bands', 'rows',
+              'total_estimated_cost_gbp', 'anomalies']
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + [f"band_{band}" for band in band_labels])
+        for entry in summary:
+            writer.writerow([entry[name] for name in fields] +
+                            [entry['band_counts'].get(band, 0) for band in band_labels])
+    return path
@@ -0,0 +1,79 @@
+"""Small JSON-over-HTTP front end for ratecard.query.RateIndex.
+
+    GET /rate?role=Senior+Designer&region=UK-LON&currency=USD
+    GET /rates?band=M&max_gbp=120&convert_to=EUR&limit=50
+    GET /health
+
+/rate returns one row (404 if unknown); /rates takes any of role, region,
+band, currency, category, min_gbp, max_gbp, convert_to and limit and returns
+a list. Standard library only; meant for a trusted network.
+"""
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PORT = 8765
+
+# /rates query parameter -> RateIndex.query() keyword (and converter).
+RATES_PARAMS = {
+    'role': ('role', str),
+    'region': ('region', str),
+    'band': ('band', str),
+    'currency': ('currency', str),
+    'category': ('category', str),
+    'min_gbp': ('min_hourly_gbp', float),
+    'max_gbp': ('max_hourly_gbp', float),
+    'convert_to': ('convert_to', str),
+    'limit': ('limit', int),
+}
+
+def make_handler(index, source=None):
+    """A request handler class serving `index`."""
+
+    class RateQueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            try:
+                if url.path == '/rate':
+                    if 'role' not in params or 'region' not in params:
+                        return self.send_json(400, {'error': "role and region are required"})
+                    record = index.get(params['role'], params['region'], params.get('currency'))
+                    if record is None:
+                        return self.send_json(404, {'error': "no rate for that role and region"})
+                    return self.send_json(200, record)
+                if url.path == '/rates':
+                    unknown = set(params) - set(RATES_PARAMS)
+                    if unknown:
+                        return self.send_json(400, {'error': f"unknown parameters: {', '.join(sorted(unknown))}"})
+                    kwargs = {RATES_PARAMS[name][0]: RATES_PARAMS[name][1](value) for name, value in params.items()}
+                    return self.send_json(200, index.query(**kwargs))
+                if url.path == '/health':
+                    return self.send_json(200, {'rows': len(index), 'source': source})
+                return self.send_json(404, {'error': f"unknown path {url.path}"})
+            except ValueError as e:
+                return self.send_json(400, {'error': str(e)})
+
+        def send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return RateQueryHandler
+
+def serve(index, host='127.0.0.1', port=DEFAULT_PORT, source=None):
+    """Serves `index` until interrupted."""
+    server = ThreadingHTTPServer((host, port), make_handler(index, source))
+    print(f"Serving {len(index)} rates from {source or 'memory'} on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
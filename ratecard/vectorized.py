@@ -0,0 +1,164 @@
+"""Vectorized (pandas/NumPy) backend for the v10 refinement logic.
+
+Every step works on whole columns; the few values that NumPy cannot
+reproduce exactly (odd currency strings, ties when rounding to pennies) fall
+back to the pure-Python rule so the CSV is byte-identical to
+ratecard.engine.refine_data().
+"""
+import numpy as np
+import pandas as pd
+
+from ratecard import engine
+from ratecard.engine import FX_TABLE, get_output_headers
+from ratecard.ingest import open_rate_file
+from ratecard.money import STRIP_PATTERN, clean_currency, round2
+
+PLAIN_NUMBER = r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?'
+
+def clean_currency_column(col):
+    """Vectorized clean_currency(): strips symbols/separators and parses floats, 0.0 on failure."""
+    stripped = col.str.replace(STRIP_PATTERN, '', regex=True)
+    values = np.zeros(len(col), dtype=np.float64)
+
+    # Plain decimal strings go through NumPy's float conversion (same as float()).
+    plain = stripped.str.fullmatch(PLAIN_NUMBER).to_numpy(dtype=bool)
+    values[plain] = stripped[plain].to_numpy(dtype=object).astype(np.float64)
+
+    # Anything else that isn't empty ('1_000', 'nan', 'n/a' ...) takes the scalar parser.
+    odd = ~plain & (col != '').to_numpy(dtype=bool)
+    if odd.any():
+        values[odd] = [clean_currency(v) for v in col[odd]]
+    return values
+
+def format_floats(values):
+    return pd.Series(values).map(repr).to_numpy(dtype=object)
+
+def read_rate_card(input_file):
+    """Returns (headers, DataFrame of str columns) using the v10 header detection."""
+    with open_rate_file(input_file) as rate_file:
+        headers = rate_file.headers
+        header_row_index = rate_file.header_line
+        carriage_returns = rate_file.has_carriage_returns()
+    if not headers:
+        return headers, None
+    df = pd.read_csv(
+        input_file,
+        skiprows=header_row_index + 1,
+        header=None,
+        names=headers,
+        dtype=str,
+        keep_default_na=False,
+        encoding='utf-8-sig',
+        encoding_errors='replace',
+    )
+    df = df.fillna('')
+    # pandas keeps a CRLF inside a quoted cell; the text-mode readers see '\n'.
+    if carriage_returns:
+        for i in range(df.shape[1]):
+            column = df.iloc[:, i]
+            if column.str.contains('\r', regex=False).any():
+                df.iloc[:, i] = column.str.replace('\r\n', '\n', regex=False).str.replace('\r', '\n', regex=False)
+    return headers, df
+
+def refine_frame(df, fx=FX_TABLE):
+    """Applies the v10 proxy/cost/band/anomaly steps to `df` in place.
+
+    Returns the number of gaps filled from proxy regions.
+    """
+    n = len(df)
+    empty = pd.Series([''] * n, index=df.index, dtype=object)
+    role = df['Role'] if 'Role' in df else empty
+    region = df['Region'] if 'Region' in df else empty
+    unit = df['Unit'].str.strip().str.lower() if 'Unit' in df else pd.Series(['hour'] * n, index=df.index)
+    currency = df['Currency'].str.strip().str.upper() if 'Currency' in df else pd.Series(['GBP'] * n, index=df.index)
+    rate_low = clean_currency_column(df['Rate_low']) if 'Rate_low' in df else np.zeros(n)
+    notes = (df['Notes'] if 'Notes' in df else empty).to_numpy(dtype=object).copy()
+
+    # A. FILL GAPS WITH PROXIES
+    # The lookup keeps the last positive rate per stripped role|region. Gap
+    # rows are resolved through engine.PROXY_RESOLVER (chains, memoized per
+    # role; see engine.configure), so only rows with a gap in a proxy region
+    # touch Python.
+    priced_pos = np.flatnonzero(rate_low > 0)
+    lookup_keys = (role.str.strip() + '|' + region.str.strip()).to_numpy(dtype=object)[priced_pos]
+    proxies = engine.PROXY_RESOLVER.bind(dict(zip(lookup_keys, rate_low[priced_pos].tolist())))
+
+    gap = (rate_low == 0) & region.isin(list(engine.PROXY_RESOLVER.chains)).to_numpy(dtype=bool)
+    gap_pos = np.flatnonzero(gap)
+    gap_regions = region.to_numpy(dtype=object)[gap_pos]
+    resolved = [proxies.resolve(r, g) for r, g in zip(role.to_numpy(dtype=object)[gap_pos], gap_regions)]
+
+    found = np.array([r is not None for r in resolved], dtype=bool)
+    filled_pos = gap_pos[found]
+    new_rates = round2(np.array([r[0] for r in resolved if r is not None], dtype=np.float64))
+    rate_low[filled_pos] = new_rates
+    if len(filled_pos):
+        new_rate_text = format_floats(new_rates)
+        df.iloc[filled_pos, df.columns.get_loc('Rate_low')] = new_rate_text
+        if 'Rate_high' in df:  # the python writer only writes columns the card has
+            df.iloc[filled_pos, df.columns.get_loc('Rate_high')] = new_rate_text
+
+    gap_notes = notes[gap_pos]
+    notes[gap_pos] = [
+        f"{note} | {r[1]}" if r is not None else f"{note} | {proxies.missing_note(g)}"
+        for note, r, g in zip(gap_notes, resolved, gap_regions)
+    ]
+
+    # B. CALCULATE COST
+    priced = rate_low > 0
+    estimated_cost = np.zeros(n)
+    estimated_cost[priced] = round2(rate_low[priced] / engine.PRICE_TO_COST_MULTIPLIER)
+    cost_text = np.full(n, '0', dtype=object)
+    cost_text[priced] = format_floats(estimated_cost[priced])
+    df['Estimated_Cost'] = cost_text
+
+    # C. AUTO-BANDING (CURRENCY & UNIT AWARE)
+    currency_codes, currency_labels = pd.factorize(currency, sort=False)
+    rate_for_banding = fx.convert_many(rate_low, currency_codes, currency_labels)
+    is_day = unit.str.contains('day', regex=False).to_numpy(dtype=bool)
+    rate_for_banding[is_day] = rate_for_banding[is_day] / engine.HOURS_PER_DAY
+    bands = np.full(n, 'Unknown', dtype=object)
+    bands[priced] = engine.BAND_INDEX.classify(rate_for_banding[priced])
+    df['Band'] = bands
+
+    # D. ANOMALY DETECTION
+    df['Notes'] = pd.Series(notes, index=df.index, dtype=object).str.strip(' |')
+    df['Anomaly_Flag'] = np.where((estimated_cost > rate_low) & priced, 'Cost > Price', '')
+
+    return len(filled_pos)
+
+def refine_data(input_file, output_file, report, fx=FX_TABLE):
+    print(f"--- Starting Data Refinement (v10 - Currency & Unit Aware, pandas) on {input_file} ---")
+
+    # 1. READ DATA WITH SMART HEADER DETECTION
+    try:
+        with report.stage('read') as stage:
+            headers, df = read_rate_card(input_file)
+            stage['rows'] = 0 if df is None else len(df)
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return
+
+    if df is None:
+        print("Error: Could not find a valid header row containing 'Role' and 'Region'.")
+        return
+    print(f"Loaded {len(df)} data rows.")
+
+    # 2. ENRICH COLUMNS
+    with report.stage('enrich') as stage:
+        count_proxies = refine_frame(df, fx)
+        stage['rows'] = len(df)
+
+    # 3. WRITE OUTPUT
+    try:
+        with report.stage('write') as stage:
+            df.to_csv(output_file, columns=get_output_headers(headers), index=False, encoding='utf-8', lineterminator='\r\n')
+            stage['rows'] = len(df)
+        report.info.update(rows=len(df), proxies_filled=count_proxies)
+        print(f"--- SUCCESS ---")
+        print(f"Generated: {output_file}")
+        print(f"Total Rows: {len(df)}")
+        print(f"Filled {count_proxies} gaps using proxies.")
+        return True
+    except Exception as e:
+        print(f"Error writing file: {e}")
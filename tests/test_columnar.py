@@ -0,0 +1,26 @@
+import csv
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from ratecard.columnar import RateCardColumns, write_columnar
+
+def write_refined(path, rates):
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Role', 'Region', 'Currency', 'Rate_low', 'Band'])
+        writer.writerows([f"Role {i}", 'UK-LON', 'GBP', rate, 'K'] for i, rate in enumerate(rates))
+    return str(path)
+
+def test_rebuild_leaves_a_live_cache_intact(tmp_path):
+    card = write_refined(tmp_path / 'card.csv', [10.0, 20.0, 30.0])
+    cache = write_columnar(card)
+    live = RateCardColumns(cache)
+
+    write_refined(card, [1.0, 2.0])
+    assert write_columnar(card) == cache
+    assert live['Rate_low'].tolist() == [10.0, 20.0, 30.0]
+    assert RateCardColumns(cache)['Rate_low'].tolist() == [1.0, 2.0]
+    assert sorted(os.listdir(tmp_path)) == ['card.cols', 'card.csv']
@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import os
+import random
+import uuid
+
+import pytest
+
+from ratecard.export import collection_path, export_rates, latest_documents, read_documents
+
+HEADERS = ['Role', 'Region', 'Unit', 'Currency', 'Rate_low', 'Rate_high', 'Source']
+
+def write_card(path, rows):
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+    return str(path)
+
+def card_rows(count=40, repeats=3):
+    """Rows whose Role_Region IDs recur far apart, so they land in different batches."""
+    rows = []
+    for version in range(repeats):
+        for i in range(count):
+            rows.append([f"Role {i}", 'UK-LON', 'Hour', 'GBP', str(50 + i + version), str(60 + i + version),
+                         f"Supplier {version}"])
+    return rows
+
+def expected(csv_path):
+    return {doc_id: without_timestamp(data) for doc_id, data in latest_documents(read_documents(csv_path)).items()}
+
+def without_timestamp(data):
+    return {name: value for name, value in data.items() if name != 'uploadedAt'}
+
+class MemoryCollection:
+    """A committer that applies each batch after a random delay, like concurrent commits landing out of order."""
+
+    def __init__(self, seed=0):
+        self.documents = {}
+        self.random = random.Random(seed)
+
+    async def commit(self, docs):
+        await asyncio.sleep(self.random.random() * 0.01)
+        for doc_id, data in docs:
+            if data is None:
+                self.documents.pop(doc_id, None)
+            else:
+                self.documents[doc_id] = without_timestamp(data)
+
+def test_concurrent_full_export_keeps_last_row_per_document(tmp_path):
+    csv_path = write_card(tmp_path / 'card.csv', card_rows())
+    for seed in range(5):
+        collection = MemoryCollection(seed)
+        assert export_rates(csv_path, batch_size=7, concurrency=8, restart=True, commit=collection.commit)
+        assert collection.documents == expected(csv_path)
+
+def test_delta_after_full_export_converges(tmp_path):
+    rows = card_rows()
+    csv_path = write_card(tmp_path / 'card.csv', rows)
+    collection = MemoryCollection()
+    assert export_rates(csv_path, batch_size=7, concurrency=8, commit=collection.commit)
+
+    rows[5][4] = '999'                   # an earlier row for Role 5, shadowed by a later one
+    rows[-1][4] = '123'                  # the row Role 39's document holds
+    rows = [row for row in rows if row[0] != 'Role 7']
+    rows.append(['Role 99', 'US-NYC', 'Hour', 'USD', '100', '120', 'Supplier 9'])
+    write_card(csv_path, rows)
+    assert export_rates(csv_path, batch_size=7, concurrency=8, delta=True, commit=collection.commit)
+    assert collection.documents == expected(csv_path)
+
+    full = MemoryCollection()
+    assert export_rates(csv_path, batch_size=7, concurrency=8, restart=True, commit=full.commit)
+    assert collection.documents == full.documents
+
+@pytest.mark.skipif(not os.environ.get('FIRESTORE_EMULATOR_HOST'), reason="needs the Firestore emulator")
+def test_export_to_emulator(tmp_path):
+    firestore = pytest.importorskip('google.cloud.firestore')
+    csv_path = write_card(tmp_path / 'card.csv', card_rows())
+    app_id = f"test-{uuid.uuid4().hex}"
+    project = os.environ.get('GOOGLE_CLOUD_PROJECT', 'demo-ratecard')
+    assert export_rates(csv_path, app_id=app_id, project=project, batch_size=7, concurrency=4)
+
+    client = firestore.Client(project=project)
+    stored = {doc.id: without_timestamp(doc.to_dict())
+              for doc in client.collection(collection_path(app_id)).stream()}
+    assert stored == expected(csv_path)
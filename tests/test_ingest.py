@@ -0,0 +1,47 @@
+import csv
+
+import pytest
+
+from ratecard.ingest import open_rate_file, plan_outputs, run_each
+
+def card(notes):
+    return [
+        ['48', '445', '', ''],
+        ['Role', 'Region', 'Rate_low', 'Notes'],
+        ['Dev', 'UK-LON', '£1,200.00', notes],
+        [],
+        ['Dev', 'EU-ES', '', 'plain'],
+    ]
+
+def text_mode_rows(path):
+    """What the old readers saw: universal newlines, header and junk skipped."""
+    with open(path, mode='r', encoding='utf-8') as f:
+        rows = [tuple(row) for row in csv.reader(f) if row]
+    return rows[rows.index(('Role', 'Region', 'Rate_low', 'Notes')) + 1:]
+
+@pytest.mark.parametrize('line_end', ['\n', '\r\n'])
+@pytest.mark.parametrize('notes', ['one line', 'first line\r\nsecond line', 'first line\nsecond line', 'bare\rreturn'])
+def test_rows_match_the_text_mode_reader(tmp_path, line_end, notes):
+    path = tmp_path / 'card.csv'
+    with open(path, mode='w', newline='', encoding='utf-8') as f:
+        csv.writer(f, lineterminator=line_end).writerows(card(notes))
+    with open_rate_file(str(path)) as rate_file:
+        assert rate_file.headers == ['Role', 'Region', 'Rate_low', 'Notes']
+        assert list(rate_file.rows()) == text_mode_rows(path)
+        assert list(rate_file.rows()) == list(rate_file.rows())
+
+def test_plan_outputs_names_outputs_and_skips_earlier_ones(tmp_path):
+    for name in ('a.csv', 'b.csv', 'a_OUT.csv'):
+        (tmp_path / name).write_text('Role,Region\n')
+    out_dir = tmp_path / 'out'
+
+    jobs = plan_outputs([str(tmp_path / '*.csv')], '_OUT.csv', output_dir=str(out_dir))
+
+    assert jobs == [(str(tmp_path / n), str(out_dir / f"{n[0]}_OUT.csv")) for n in ('a.csv', 'b.csv')]
+    assert out_dir.is_dir()
+    assert run_each(jobs, lambda input_file, target: input_file.endswith('a.csv')) == {
+        str(tmp_path / 'a.csv'): str(out_dir / 'a_OUT.csv'),
+        str(tmp_path / 'b.csv'): None,
+    }
+    with pytest.raises(ValueError):
+        plan_outputs(str(tmp_path / '*.csv'), '_OUT.csv', output_file=str(tmp_path / 'x.csv'))
@@ -0,0 +1,113 @@
+import csv
+import os
+
+import pytest
+
+from ratecard import engine
+from ratecard.engine import refine_data
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MASTER = os.path.join(REPO, 'Master_3000_Rows.csv')
+
+# Junk preamble, quoted and R$ money, a blank and a short row, CRLF line
+# ends with a multi-line Notes cell, an unknown currency, proxy gaps and
+# no Rate_high column.
+EDGE_CARD = (
+    '48,445,,,,,,\r\n'
+    'Category | Function,Role,Unit,Region,Rate_low,Currency,Source,Notes\r\n'
+    'Creative,Designer,Hour,UK-LON,"£1,200.00",GBP,S1,plain\r\n'
+    'Creative,Designer,Hour,EU-ES,,EUR,S1,"first line\r\nsecond line"\r\n'
+    'Creative,Designer,Day,BR-SP,R$ 450,BRL,S1,\r\n'
+    '\r\n'
+    'Creative,Writer,Hour,UK-LON\r\n'
+    'Creative,Writer,Hour,EU-ES,,EUR,S1,gap without a base\r\n'
+    'Tech,Developer,Hour,US-NYC,100,XYZ,S2,unknown currency\r\n'
+    'Tech,Developer,Hour,US-SEA,,USD,S2,"quoted, comma"\r\n'
+    'Tech,Developer,Day,US-AUS, $95.50 ,usd,S2,\r\n'
+    'Tech,Developer,Hour,APAC-PH,,PHP,S2,base missing\r\n'
+)
+
+MODES = {
+    'streaming': dict(streaming=True),
+    'workers': dict(workers=2),
+    'pandas': dict(engine='pandas'),
+    'incremental': dict(incremental=True),
+}
+
+def refine_bytes(input_file, output_file, **options):
+    assert refine_data(input_file, str(output_file), **options)
+    with open(output_file, mode='rb') as f:
+        return f.read()
+
+@pytest.fixture(params=['master', 'edge'])
+def card(request, tmp_path):
+    if request.param == 'master':
+        return MASTER
+    path = tmp_path / 'edge.csv'
+    path.write_bytes(EDGE_CARD.encode('utf-8'))
+    return str(path)
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_every_mode_matches_the_in_memory_engine(card, mode, tmp_path):
+    if mode == 'pandas':
+        pytest.importorskip('pandas')
+    expected = refine_bytes(card, tmp_path / 'expected.csv')
+    assert refine_bytes(card, tmp_path / f"{mode}.csv", **MODES[mode]) == expected
+
+def test_incremental_rerun_matches(card, tmp_path):
+    expected = refine_bytes(card, tmp_path / 'expected.csv')
+    output = tmp_path / 'incremental.csv'
+    refine_bytes(card, output, incremental=True)
+    assert refine_bytes(card, output, incremental=True) == expected
+
+@pytest.fixture
+def derived_tables():
+    """engine.configure() with grade-style tables, restored afterwards."""
+    band_ranges, location_proxies = engine.BAND_RANGES, engine.LOCATION_PROXIES
+    engine.configure([(0, 50, 'X'), (50, 9999, 'Y')], {'EU-ES': {'base': 'UK-LON', 'mult': 0.5}})
+    yield
+    engine.configure(band_ranges, location_proxies)
+
+@pytest.mark.parametrize('mode', sorted(MODES))
+def test_configured_tables_reach_every_mode(derived_tables, mode, tmp_path):
+    if mode == 'pandas':
+        pytest.importorskip('pandas')
+    card = tmp_path / 'edge.csv'
+    card.write_bytes(EDGE_CARD.encode('utf-8'))
+    expected = refine_bytes(str(card), tmp_path / 'expected.csv')
+    assert refine_bytes(str(card), tmp_path / f"{mode}.csv", **MODES[mode]) == expected
+
+    with open(tmp_path / 'expected.csv', newline='', encoding='utf-8') as f:
+        rows = {(row['Role'], row['Region'], row['Unit']): row for row in csv.DictReader(f)}
+    assert rows['Designer', 'EU-ES', 'Hour']['Rate_low'] == '600.0'
+    assert rows['Designer', 'EU-ES', 'Hour']['Band'] == 'Y'
+    assert rows['Developer', 'US-SEA', 'Hour']['Band'] == 'Unknown'  # no longer a proxy region
+
+@pytest.mark.parametrize('options', [
+    dict(streaming=True, workers=2),
+    dict(engine='pandas', incremental=True),
+    dict(engine='pandas', streaming=True),
+    dict(incremental=True, workers=2),
+    dict(engine='numpy'),
+])
+def test_conflicting_modes_are_rejected(options, tmp_path):
+    with pytest.raises(ValueError):
+        refine_data(MASTER, str(tmp_path / 'out.csv'), **options)
+    assert not os.path.exists(tmp_path / 'out.csv')
+
+@pytest.mark.parametrize('mode', ['python', 'pandas'])
+def test_script_settings_reach_the_engine(mode, monkeypatch, tmp_path):
+    if mode == 'pandas':
+        pytest.importorskip('pandas')
+    import refine_rates_v10
+
+    card = tmp_path / 'edge.csv'
+    card.write_bytes(EDGE_CARD.encode('utf-8'))
+    monkeypatch.setattr(refine_rates_v10, 'INPUT_FILE', str(card))
+    monkeypatch.setattr(refine_rates_v10, 'OUTPUT_FILE', str(tmp_path / 'out.csv'))
+    monkeypatch.setattr(refine_rates_v10, 'PRICE_TO_COST_MULTIPLIER', 2.0)
+    assert refine_rates_v10.refine_data(engine=mode)
+
+    with open(tmp_path / 'out.csv', newline='', encoding='utf-8') as f:
+        rows = {(row['Role'], row['Region'], row['Unit']): row for row in csv.DictReader(f)}
+    assert rows['Designer', 'UK-LON', 'Hour']['Estimated_Cost'] == '600.0'
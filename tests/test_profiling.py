@@ -0,0 +1,22 @@
+import json
+
+from ratecard import profiling
+from ratecard.profiling import RunReport, maxrss_kb
+
+def test_maxrss_is_reported_in_kb(monkeypatch):
+    monkeypatch.setattr(profiling.sys, 'platform', 'darwin')
+    assert maxrss_kb(50 * 1024 * 1024) == 50 * 1024
+    monkeypatch.setattr(profiling.sys, 'platform', 'linux')
+    assert maxrss_kb(50 * 1024) == 50 * 1024
+
+def test_report_without_resource_module(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, 'resource', None)
+    report = RunReport()
+    report.start()
+    with report.stage('read') as stage:
+        stage['rows'] = 10
+    report.finish()
+    with open(report.write(str(tmp_path / 'out.csv')), encoding='utf-8') as f:
+        written = json.load(f)
+    assert written['peak_rss_kb'] is None
+    assert written['stages'][0]['peak_rss_kb'] is None
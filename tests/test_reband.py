@@ -0,0 +1,31 @@
+import csv
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from ratecard.engine import reband
+from ratecard.fx import FxTable
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.reader(f))
+
+@pytest.mark.parametrize('headers', [
+    ['Role', 'Region', 'Rate_low', 'Currency', 'Unit', 'Band'],
+    ['Band', 'Currency', 'Unit', 'Rate_low', 'Region', 'Role'],
+    ['Role', 'Region', 'Rate_low', 'Currency', 'Unit'],
+])
+def test_reband_columns_follow_their_names(headers, tmp_path):
+    values = {'Role': 'Dev', 'Region': 'EU-ES', 'Rate_low': '90', 'Currency': 'EUR', 'Unit': 'Hour', 'Band': 'K'}
+    card = tmp_path / 'card.csv'
+    with open(card, mode='w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows([headers, [values[name] for name in headers]])
+
+    fx = FxTable({'GBP': 1.0, 'EUR': 2.0, 'DEFAULT': 1.0}, name='double')
+    header, row = read_rows(reband(str(card), [fx], str(tmp_path / 'bands.csv')))
+    expected = [name for name in ('Role', 'Region', 'Currency', 'Rate_low', 'Band') if name in headers]
+    assert header == expected + ['Band double']
+    expected_row = dict({name: values[name] for name in expected}, Rate_low='90.0')
+    expected_row['Band double'] = 'N'  # 90 EUR at 2.0 = 180 GBP
+    assert dict(zip(header, row)) == expected_row
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+from ratecard.generator import TitleMatcher, load_raw_roles, read_truth_roles
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRUTH_FILE = os.path.join(REPO, 'Roles x Rates reconcilliation - _ADJUSTED FOR TRUTH.csv')
+RAW_FILE = os.path.join(REPO, 'Roles x Rates reconcilliation - _RAW_CONTENT LAB.csv')
+
+@pytest.fixture(scope='module')
+def matches():
+    """{truth role: (truth rate, matched raw title, raw UK rate, score)} over the shipped pair."""
+    matcher = TitleMatcher(load_raw_roles(RAW_FILE, use_cache=False))
+    found = {}
+    for role_name, category, target_rate in read_truth_roles(TRUTH_FILE):
+        best = matcher.index.best(role_name, category, price=target_rate, min_score=matcher.min_score)
+        if best is not None:
+            i, score = best
+            found[role_name] = (target_rate, matcher.roles[i][1], matcher.roles[i][3], score)
+    return found
+
+@pytest.mark.parametrize('role_name, expected', [
+    ('Investor Relations & Regulatory Associate', 'Associate, Regulatory Review'),
+    ('Event Planner', 'Meeting Planner'),
+    ('Senior Planner', 'Senior Planner'),
+])
+def test_title_match(matches, role_name, expected):
+    assert matches[role_name][1] == expected
+
+def test_matches_agree_on_price_unless_the_title_is_exact(matches):
+    # The truth file adjusted a few rates; an identical title still wins there.
+    disagree = {role: match for role, match in matches.items() if match[0] != match[2]}
+    assert all(score == 1.0 and title == role for role, (_, title, _, score) in disagree.items())